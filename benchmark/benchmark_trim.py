@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""Benchmark of quality trimming (trimtype Q), comparing the running window sum engine in trim() with the previous
+implementation, which recomputed the window mean and re-sliced the read one base at a time."""
+
+# Import libraries
+import argparse, random, sys, time
+
+sys.path.append('src')
+
+from xtrim import trim
+
+
+def legacy_trim(entry, Qlist, thres3 = None, thres5 = None, mw = None):
+    """The quality trimming of trim() before the running window sum engine, kept as reference for the benchmark."""
+    if mw is None:
+        mw = 1
+
+    if mw > len(entry[1]):
+        return False
+
+    if thres5 is not None:
+        i = 0
+        while sum(Qlist[i:i+mw])/mw < thres5 and mw <= len(entry[1]):
+            entry[1] = entry[1][1:]
+            entry[3] = entry[3][1:]
+            i += 1
+
+    if thres3 is not None:
+        j = 0
+        while sum(Qlist[::-1][j:j+mw])/mw < thres3 and mw <= len(entry[1]):
+            entry[1] = entry[1][:-1]
+            entry[3] = entry[3][:-1]
+            j += 1
+
+    if len(entry[1]) < mw:
+        return False
+
+    return entry
+
+
+def make_reads(n, length, seed):
+    """Creates n random reads with quality scores that drop towards both ends, like real sequencer output."""
+    rng = random.Random(seed)
+    reads = []
+    for _ in range(n):
+        Qlist = []
+        for pos in range(length):
+            edge = min(pos, length - 1 - pos)
+            Qlist.append(max(0, min(41, int(rng.gauss(min(36, 4 + edge), 6)))))
+        seq = ''.join(rng.choice('ACGT') for _ in range(length))
+        qual = ''.join(chr(q + 33) for q in Qlist)
+        reads.append((['@read', seq, '+', qual], Qlist))
+    return reads
+
+
+def reads_per_sec(func, reads, repeat, **kwargs):
+    """Returns the best number of reads per second over a number of repeats."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for entry, Qlist in reads:
+            func(list(entry), Qlist, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return len(reads) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of quality trimming in XTrim")
+    parser.add_argument("-n", "--reads", type=int, default=2000, help="Number of reads per run")
+    parser.add_argument("-L", "--length", type=int, nargs='+', default=[150, 300], help="Read lengths to benchmark")
+    parser.add_argument("-w", "--movwin", type=int, nargs='+', default=[1, 5, 10, 25], help="Moving window sizes to benchmark")
+    parser.add_argument("-t", "--thres", type=int, default=20, help="Quality threshold for both ends")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Number of repeats, the best one is reported")
+    parser.add_argument("-s", "--seed", type=int, default=1, help="Seed for the random reads")
+    args = parser.parse_args()
+
+    print(f"{'length':>8} {'window':>8} {'legacy reads/s':>16} {'trim() reads/s':>16} {'speedup':>8}")
+    for length in args.length:
+        reads = make_reads(args.reads, length, args.seed)
+        for mw in args.movwin:
+            # both implementations have to agree before timing them
+            for entry, Qlist in reads:
+                assert legacy_trim(list(entry), Qlist, args.thres, args.thres, mw) == trim(list(entry), Qlist, "Q", args.thres, args.thres, mw)
+
+            old = reads_per_sec(legacy_trim, reads, args.repeat, thres3 = args.thres, thres5 = args.thres, mw = mw)
+            new = reads_per_sec(trim, reads, args.repeat, trimtype = "Q", thres3 = args.thres, thres5 = args.thres, mw = mw)
+            print(f"{length:>8} {mw:>8} {old:>16.0f} {new:>16.0f} {new / old:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
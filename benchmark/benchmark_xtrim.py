@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+"""Benchmark suite of XTrim. Times each stage (parse, decode, trim, adapter, postprocess, write, compression, batch mode) and the command line
+end to end on synthetic FASTQ files, in reads/s and MB/s. Results can be saved as JSON, and compared against a saved baseline,
+failing when a stage is slower than the baseline by more than a threshold."""
+
+# Import libraries
+import argparse, gzip, io, json, os, platform, subprocess, sys, tempfile, time
+
+sys.path.append('src')
+sys.path.append('benchmark')
+
+import xtrim
+from fastq_generator import generate_entries
+
+
+def best_time(func, repeat):
+    """Returns the best time of a number of calls to func."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def result(seconds, reads, nbytes):
+    """Returns the speed of a stage in reads/s and MB/s of uncompressed FASTQ."""
+    return {'seconds': seconds, 'reads_per_sec': reads / seconds, 'mb_per_sec': nbytes / seconds / 1e6}
+
+
+def run_cli(inputfile, outputfile, logfile, trimoptions, options = ()):
+    """Runs the command line of XTrim on one file."""
+    command = [sys.executable, 'src/xtrim.py', '-i', inputfile, '-o', outputfile, '-lg', logfile] + trimoptions + list(options)
+    subprocess.run(command, check = True, stdout = subprocess.DEVNULL)
+
+
+def run_benchmarks(args):
+    """Runs all stages on the synthetic reads, and returns the results of each stage."""
+    length = args.length[0] if len(args.length) == 1 else tuple(args.length[:2])
+    data = ''.join(generate_entries(args.reads, length, args.profile, args.nrate, args.phred, args.seed)).encode('ascii')
+    gzdata = gzip.compress(data, 6)
+    n, nbytes = args.reads, len(data)
+
+    config = xtrim.TrimConfig("Q", phred = args.phred, thres3 = 20, thres5 = 20, movwin = 5, minlen = 50, minqual = 20, maxN = 5)
+    trimoptions = ['-p', str(args.phred), '-tt', 'Q', '-t3', '20', '-t5', '20', '-w', '5', '-l', '50', '-q', '20', '-N', '5']
+
+    # inputs of each stage are prepared once, from the output of the previous stage
+    records = list(xtrim.FastqReader(io.BytesIO(data)))
+    Qlists = [xtrim.convert_phred(record.qual, config.phred) for record in records]
+    bounds = [xtrim.trim_bounds(len(record.seq), Qlist, config.trimtype, config.thres3, config.thres5, config.movwin) for record, Qlist in zip(records, Qlists)]
+    trimmed = [(xtrim.trim_entry(record, *b), Qlist[b[0]:b[1]]) for record, Qlist, b in zip(records, Qlists, bounds) if b is not False]
+
+    adapters = xtrim.AdapterTrimmer(['illumina'], polyg = 10)
+
+    def write():
+        writer = xtrim.FastqWriter(io.BytesIO())
+        for record in records:
+            writer.write_record(record)
+        writer.flush()
+
+    stages = {
+        'parse': lambda: sum(1 for _ in xtrim.FastqReader(io.BytesIO(data))),
+        'decompress_gzip': lambda: sum(1 for _ in xtrim.FastqReader(gzip.GzipFile(fileobj = io.BytesIO(gzdata)))),
+        'decode': lambda: [xtrim.convert_phred(record.qual, config.phred) for record in records],
+        'control': lambda: [xtrim.control_entry(record) for record in records],
+        'trim': lambda: [xtrim.trim_bounds(len(record.seq), Qlist, config.trimtype, config.thres3, config.thres5, config.movwin) for record, Qlist in zip(records, Qlists)],
+        'adapter': lambda: [adapters.cut(record.seq) for record in records],
+        'postprocess': lambda: [xtrim.postprocess(entry, Qlist, config.minlen, config.minqual, config.maxN) for entry, Qlist in trimmed],
+        'check_entry': lambda: [xtrim.check_entry(record, config) for record in records],
+        'write': write,
+        'compress_gzip': lambda: gzip.compress(data, 6),
+    }
+    if xtrim.np is not None:
+        stages['batch_check'] = lambda: [xtrim.batch_check(records[i:i + 10000], config) for i in range(0, n, 10000)]
+
+    results = {}
+    for name, func in stages.items():
+        if args.stages and name not in args.stages:
+            continue
+        results[name] = result(best_time(func, args.repeat), n, nbytes)
+        print(f"{name:>16} {results[name]['reads_per_sec']:>14.0f} reads/s {results[name]['mb_per_sec']:>10.2f} MB/s", file = sys.stderr)
+
+    # the command line end to end, on a plain and a gzip file
+    if not args.stages or 'cli' in args.stages:
+        with tempfile.TemporaryDirectory() as tmp:
+            plain, gz = os.path.join(tmp, 'in.fq'), os.path.join(tmp, 'in.fq.gz')
+            with open(plain, 'wb') as f:
+                f.write(data)
+            with open(gz, 'wb') as f:
+                f.write(gzdata)
+
+            runs = {'cli_plain': (plain, 'out.fq', []), 'cli_gzip': (gz, 'out.fq.gz', [])}
+            if xtrim.np is not None:
+                runs['cli_plain_batch'] = (plain, 'out.fq', ['-b', '10000'])
+            for name, (inputfile, outputfile, options) in runs.items():
+                seconds = best_time(lambda: run_cli(inputfile, os.path.join(tmp, outputfile), os.path.join(tmp, 'log'), trimoptions, options), args.repeat)
+                results[name] = result(seconds, n, nbytes)
+                print(f"{name:>16} {results[name]['reads_per_sec']:>14.0f} reads/s {results[name]['mb_per_sec']:>10.2f} MB/s", file = sys.stderr)
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Compares the results with a baseline. Returns the names of the stages that are slower than the baseline by more than the threshold."""
+    regressions = []
+    print(f"{'stage':>16} {'baseline reads/s':>18} {'reads/s':>14} {'change':>8}")
+    for name, stage in results.items():
+        if name not in baseline:
+            continue
+        change = stage['reads_per_sec'] / baseline[name]['reads_per_sec'] - 1
+        slower = change < -threshold
+        if slower:
+            regressions.append(name)
+        print(f"{name:>16} {baseline[name]['reads_per_sec']:>18.0f} {stage['reads_per_sec']:>14.0f} {change:>+7.1%}{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite of XTrim")
+    parser.add_argument("-n", "--reads", type=int, default=20000, help="Number of synthetic reads")
+    parser.add_argument("-L", "--length", type=int, nargs='+', default=[150], help="Read length, or minimum and maximum read length")
+    parser.add_argument("-qp", "--profile", type=str, default='illumina', help="Quality profile of the reads (high, illumina or low)")
+    parser.add_argument("-nr", "--nrate", type=float, default=0.01, help="Rate of unknown bases")
+    parser.add_argument("-p", "--phred", type=int, default=33, choices=[33, 64], help="Phred encoding")
+    parser.add_argument("-s", "--seed", type=int, default=1, help="Seed for the random reads")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Number of repeats, the best one is reported")
+    parser.add_argument("--stages", type=str, nargs='+', help="Only run these stages (cli runs the command line end to end)")
+    parser.add_argument("--save", type=str, help="Save the results as JSON to this file")
+    parser.add_argument("--baseline", type=str, help="Compare the results with a JSON file saved with --save")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown compared to the baseline that counts as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+
+    if args.save:
+        meta = {key: value for key, value in vars(args).items() if key not in ('save', 'baseline', 'threshold')}
+        meta['python'] = platform.python_version()
+        meta['numpy'] = xtrim.np is not None
+        with open(args.save, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent = 2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Slower than the baseline: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+"""Seeded generator of synthetic FASTQ files for benchmarks. The same seed and options always give the same file."""
+
+# Import libraries
+import argparse, bz2, gzip, io, lzma, random
+
+# Mean quality score at the start, middle and end of a read, for each quality profile
+PROFILES = {
+    'high': (36, 38, 34),
+    'illumina': (30, 36, 18),
+    'low': (14, 20, 8),
+}
+
+
+def quality_means(length, profile):
+    """Returns the mean quality score at every position of a read, going linearly from the start to the middle and to the end."""
+    first, middle, last = PROFILES[profile]
+    half = max(length // 2, 1)
+    means = []
+    for pos in range(length):
+        if pos < half:
+            means.append(first + (middle - first) * pos / half)
+        else:
+            means.append(middle + (last - middle) * (pos - half) / max(length - half, 1))
+    return means
+
+
+def generate_entries(n, length = 150, profile = 'illumina', nrate = 0.01, phred = 33, seed = 1):
+    """Yields n entries as text. length is a read length, or a (min, max) range of read lengths. Unknown bases are N with the given rate, 
+    and have quality score 2."""
+    rng = random.Random(seed)
+    means = {}
+    for i in range(n):
+        readlength = length if isinstance(length, int) else rng.randint(*length)
+        if readlength not in means:
+            means[readlength] = quality_means(readlength, profile)
+
+        seq = []
+        qual = []
+        for mean in means[readlength]:
+            if rng.random() < nrate:
+                seq.append('N')
+                qual.append(chr(2 + phred))
+            else:
+                seq.append(rng.choice('ACGT'))
+                qual.append(chr(max(2, min(41, round(rng.gauss(mean, 4)))) + phred))
+        yield f"@read{i} length={readlength}\n{''.join(seq)}\n+\n{''.join(qual)}\n"
+
+
+def write_fastq(filename, n, compression = None, **kwargs):
+    """Writes n entries to a FASTQ file, compressed with gzip, bzip2 or xz if given. The other options are given to generate_entries()."""
+    if compression == 'gzip':
+        # the modification time in the gzip header is left out, so the file is the same for the same seed
+        f = io.TextIOWrapper(gzip.GzipFile(filename, 'wb', mtime = 0))
+    else:
+        f = {None: open, 'bzip2': bz2.open, 'xz': lzma.open}[compression](filename, 'wt')
+    with f:
+        for entry in generate_entries(n, **kwargs):
+            f.write(entry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic FASTQ files for XTrim benchmarks")
+    parser.add_argument("-o", "--output", type=str, required=True, help="Output file")
+    parser.add_argument("-n", "--reads", type=int, default=100000, help="Number of reads")
+    parser.add_argument("-L", "--length", type=int, nargs='+', default=[150], help="Read length, or minimum and maximum read length")
+    parser.add_argument("-qp", "--profile", type=str, default='illumina', choices=sorted(PROFILES), help="Quality profile along the reads")
+    parser.add_argument("-nr", "--nrate", type=float, default=0.01, help="Rate of unknown bases")
+    parser.add_argument("-p", "--phred", type=int, default=33, choices=[33, 64], help="Phred encoding")
+    parser.add_argument("-c", "--compression", type=str, default=None, choices=['gzip', 'bzip2', 'xz'], help="Compression of the output file")
+    parser.add_argument("-s", "--seed", type=int, default=1, help="Seed for the random reads")
+    args = parser.parse_args()
+
+    length = args.length[0] if len(args.length) == 1 else tuple(args.length[:2])
+    write_fastq(args.output, args.reads, args.compression, length = length, profile = args.profile, nrate = args.nrate, phred = args.phred, seed = args.seed)
+
+
+if __name__ == "__main__":
+    main()
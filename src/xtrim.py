@@ -1,26 +1,65 @@
 #!/usr/bin/env python3
 
 # Import libraries
-import gzip, re, argparse
+import gzip, bz2, lzma, zlib, struct, argparse, contextlib, glob, hashlib, itertools, json, math, multiprocessing, os, queue, shutil, subprocess, sys, threading, time
+from collections import Counter, defaultdict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
-# Functions for entry processing
-def control_entry(entry): 
-    """Function ensures that the three first lines of each read are in the correct format. Returns True if they are valid, else returns False."""
-    #Check that length of sequence and quality is the same
-    if len(entry[1]) != len(entry[3]): 
-        return False
+# NumPy is only needed for batch mode
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-    # Check the entry is in the correct format by checking line 1-3 
-    if re.match(r"^@", entry[0]) is None: 
-        return False
+# zstandard is only needed for zstd files, when the zstd program is not found
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
-    if not re.match(r"^[AGCTXN]+$", entry[1]):
-        return False
+# resource is only needed for the peak memory use in profile reports, and is not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# A FASTQ entry. It is a tuple, so it is compact and cannot be changed, and its lines can be used by index like the lists of four lines 
+# that the functions below also accept.
+Record = namedtuple('Record', ['header', 'seq', 'sep', 'qual'])
+
+# Bases allowed in the sequence lines by control_entry(), for each alphabet. standard is the one XTrim has always used, with X for masked bases.
+ALPHABETS = {'standard': b'ACGTNX', 'strict': b'ACGTN', 'iupac': b'ACGTURYSWKMBDHVN'}
 
-    if not re.match(r'^\+.*$', entry[2]):
+
+def alphabet_bases(alphabet = None, ignorecase = False, validate = True):
+    """Returns the bases allowed by control_entry() for an alphabet, with the lowercase bases too if case is ignored, 
+    or None if the format of the entries is not validated."""
+    if not validate:
+        return None
+    if alphabet not in (None, *ALPHABETS):
+        raise ValueError(f"Alphabet should be one of {', '.join(ALPHABETS)}.")
+    bases = ALPHABETS[alphabet or 'standard']
+    return bases + bases.lower() if ignorecase else bases
+
+
+def entry_bases(args):
+    """Returns the bases allowed by the arguments or TrimConfig, or the standard ones when they were made without the option."""
+    return getattr(args, 'bases', ALPHABETS['standard'])
+
+
+# Functions for entry processing
+def control_entry(entry, bases = ALPHABETS['standard']): 
+    """Function ensures that the three first lines of each read are in the correct format. Returns True if they are valid, else returns False.
+    The sequence has to be made of the given bases, which are deleted from it with bytes.translate(), so nothing may be left. 
+    With bases None, for trusted input, only the lengths of the sequence and quality line are checked, since trimming relies on them."""
+    seq = entry[1]
+
+    # Check that length of sequence and quality is the same, and that they are not empty, as in a truncated entry
+    if len(seq) != len(entry[3]) or seq == '':
         return False
 
-    return True
+    # Check the entry is in the correct format by checking line 1-3 
+    return bases is None or (entry[0][:1] == '@' and entry[2][:1] == '+' and seq.isascii() and not seq.encode('ascii').translate(None, bases))
 
 
 def create_phred(N):
@@ -32,133 +71,133 @@ def create_phred(N):
     return phred_dict
 
 
+# Phred tables are created once, instead of for every read. The quality line is checked by stripping all valid characters, 
+# and converted with a byte translation table.
+PHRED33 = create_phred(33)
+PHRED64 = create_phred(64)
+PHRED_CHARS = {33: ''.join(PHRED33), 64: ''.join(PHRED64)}
+PHRED_DECODE = {E: bytes((i - E) % 256 for i in range(256)) for E in PHRED_CHARS}
+
+
+def detect_phred(qualentry):
+    """Detects the phred encoding of a quality string. Returns 33 or 64, or None if the string is not valid in either encoding."""
+    if qualentry == '':
+        return None
+    if qualentry.strip(PHRED_CHARS[33]) == '':
+        return 33
+    if qualentry.strip(PHRED_CHARS[64]) == '':
+        return 64
+    return None
+
+
 def convert_phred(qualentry, E = None):
-    """Function takes the quality string as input, and encoding E, if given. Returns the string converted to Q scores in list, if string and E is valid.q"""
-    Q_list = []
-
-    # For phred quality encoding 33
-    if E == 33:
-        phred33 = create_phred(33)
-
-        # Check the quality line of the entry and convert it to a list with converted quality scores
-        for i in qualentry:
-            if i in phred33:
-                Q_list.append(int(phred33[i]))
-            else: 
-                return False
-        return Q_list
-    
-    # For phred quality encoding 64
-    elif E == 64: 
-        phred64 = create_phred(64)
-
-        # Check the quality line of the entry and convert it to a list with converted quality scores
-        for i in qualentry:
-            if i in phred64:
-                Q_list.append(int(phred64[i]))
-            else: 
-                return False
-        return Q_list
-    
+    """Function takes the quality string as input, and encoding E, if given. Returns the string converted to Q scores in list, if string and E is valid."""
+
     # For the case that phred encoding is not given by user (it will be autodetected)
-    elif E is None:  
-        phred33 = create_phred(33)
-        phred64 = create_phred(64)
-
-        # Escape special characters and join the phred dicts into a regular expressioon
-        REphred33 = '^' + '[' + ''.join(re.escape(char) for char in phred33.keys()) + ']' + '+$' 
-        REphred64 = '[' + ''.join(re.escape(char) for char in phred64.keys()) + ']'
-        
-        # Check the quality line of the entry, and convert it to a list with converted quality scores
-        if re.match(REphred33, qualentry): 
-            for i in qualentry: 
-                Q_list.append(int(phred33[i]))
-            return Q_list
-        
-        # Check the quality line of the entry and convert it to a list with converted quality scores
-        elif re.match(REphred64, entry):
-            for i in qualentry: 
-                Q_list.append(int(phred64[i]))
-            return Q_list
-
-        else: 
+    if E is None:
+        E = detect_phred(qualentry)
+        if E is None:
             return False
-    
+
     # Controlling invalid phred encoding cases
-    else: 
+    if E not in PHRED_CHARS:
         return False
 
+    # Check the quality line of the entry only has characters of the encoding, and convert it to a list with quality scores
+    if qualentry.strip(PHRED_CHARS[E]) != '':
+        return False
+    return list(qualentry.encode('ascii').translate(PHRED_DECODE[E]))
+
+
+def quality_cut_points(Qlist, mw, thres5 = None, thres3 = None):
+    """Finds the 5' and 3' cut points for quality trimming with a running moving window sum. Returns (start, end), so that the trimmed read is read[start:end]."""
+    length = len(Qlist)
+    start = 0
+    end = length
+
+    # move the window from the 5' end until its mean quality reaches the threshold, or the window no longer fits in the read
+    if thres5 is not None:
+        window = sum(Qlist[:mw])
+        while window / mw < thres5 and mw <= length - start:
+            if start + mw < length:
+                window += Qlist[start + mw] - Qlist[start]
+            start += 1
+
+    # move the window from the 3' end in the same way, stopping when the window would overlap the 5' cut point
+    if thres3 is not None:
+        window = sum(Qlist[length - mw:])
+        while window / mw < thres3 and mw <= end - start:
+            end -= 1
+            if end - mw >= 0:
+                window += Qlist[end - mw] - Qlist[end]
+
+    return start, end
+
+
+def trim_bounds(length, Qlist, trimtype, thres3 = None, thres5 = None, mw = None):
+    """Finds the part of a read of the given length that is kept by trim(). Returns (start, end), or False if the read is trimmed too much."""
+    start, end = 0, length
 
-def trim(entry, Qlist, trimtype, thres3 = None, thres5 = None, mw = None):
-    """Trims entries based on either number of bases N, or by quality threshold Q using moving window if window size is given."""
-    
     # For trimming based on number of bases
     if trimtype == "N":
         if thres3 is not None:
-            
             # Check that trim length does not exceed the length of the entry
-            if thres3 >= len(entry[1]):
+            if thres3 >= length:
                 return False
-            
-            # trim sequence and quality line in entry from 3' end
-            entry[1] = entry[1][:-thres3]
-            entry[3] = entry[3][:-thres3]
 
-        if thres5 is not None: 
+            # trim from 3' end, with the same result as read[:-thres3]
+            end = slice(None, -thres3).indices(length)[1]
+
+        if thres5 is not None:
             # Check that trim length does not exceed the length of the entry
-            if thres5 >= len(entry[1]):
+            if thres5 >= end:
                 return False
 
-            # trim sequence and quality line in entry from 5' end
-            entry[1] = entry[1][thres5:]
-            entry[3] = entry[3][thres5:]
+            # trim from 5' end, with the same result as read[thres5:]
+            start = slice(thres5, None).indices(end)[0]
 
         if thres3 is not None and thres5 is not None:
             # Check that trim length does not exceed the length of the entry
-            if thres5+thres3 >= len(entry[1]):
+            if thres5+thres3 >= end - start:
                 return False
-        return entry
-    
+        return start, end
+
     # For trimming based on quality of bases
     elif trimtype == "Q":
 
         # if moving window size is not given, default is 1
         if mw is None:
            mw = 1
-        
+
         # Check that moving window size does not exceed the length of the entry
-        if mw > len(entry[1]):
+        if mw > length:
             return False
 
-        if thres5 is not None:
-            i = 0
-
-            # trim the entry form 5' by removing the first base in the moving window if mean quality of the moving window is lower than threshold
-            while sum(Qlist[i:i+mw])/mw < thres5 and mw <= len(entry[1]):
-                entry[1] = entry[1][1:]
-                entry[3] = entry[3][1:]
-                i += 1
+        start, end = quality_cut_points(Qlist, mw, thres5, thres3)
 
-        if thres3 is not None:
-            j = 0
-
-            # trim the entry form 3' by removing the last base in the moving window if mean quality of the moving window is lower than threshold
-            while sum(Qlist[::-1][j:j+mw])/mw < thres3 and mw <= len(entry[1]):
-                entry[1] = entry[1][:-1]
-                entry[3] = entry[3][:-1]
-                j += 1
-        
         # if the entry is trimmed to be shorter than the length of the moving window, it will be discarded
-        if len(entry[1]) < mw:
+        if end - start < mw:
             return False
-
-        return entry
+        return start, end
 
     # check that valid trimtype is given
     else:
         raise ValueError("Trimtype should be N or Q.")
 
-        
+
+def trim(entry, Qlist, trimtype, thres3 = None, thres5 = None, mw = None):
+    """Trims entries based on either number of bases N, or by quality threshold Q using moving window if window size is given."""
+    bounds = trim_bounds(len(entry[1]), Qlist, trimtype, thres3, thres5, mw)
+    if bounds is False:
+        return False
+
+    # slice the sequence and quality line only once
+    start, end = bounds
+    entry[1] = entry[1][start:end]
+    entry[3] = entry[3][start:end]
+    return entry
+
+
 def postprocess(entry, trimQlist, length = None, qual = None, N = None):
     """Postprocessing of trimmed reads, checking for minimum length, minumum quality and maximum number of unknown bases."""
     flag = True
@@ -173,26 +212,148 @@ def postprocess(entry, trimQlist, length = None, qual = None, N = None):
         if sum(trimQlist) / len(trimQlist) < qual: 
             flag = False
 
-    # check number of N bases are below given threshold
+    # check number of N bases are below given threshold, counting lowercase n bases too
     if N is not None:
-        if entry[1].count('N') > N:
+        if entry[1].count('N') + entry[1].count('n') > N:
             flag = False
     
     # flag will be returned as true if the read passes all the requirements
     return flag
 
 
-def write_log(kept, invalphred, invalentry, lowqual, overtrim, zipped, logfile): 
+# Adapters that can be given by name, with the start of their sequence
+ADAPTERS = {'illumina': 'AGATCGGAAGAGC', 'nextera': 'CTGTCTCTTATACACATCT', 'smallrna': 'TGGAATTCTCGG'}
+
+# Length of the k-mers in the index of the adapters
+KMER = 6
+
+
+class AdapterTrimmer:
+    """Finds adapters, and poly-G and poly-A tails, at the 3' end of reads, and returns where the read should be cut. 
+
+    The adapters are cut into k-mers once, and the index of these k-mers is searched for in every read with str.find(), so only the places 
+    where a k-mer of an adapter is found are compared base by base. A match of L bases may have one mismatch for every k bases after 
+    the first k, up to the mismatch budget, so it always has a k-mer without mismatches that is found. Adapters shorter than k bases are 
+    searched for whole, and matches shorter than k bases, at the very end of the read, must be exact and at least minoverlap bases long. 
+    Tails follow the same mismatch rule.
+
+    Lowercase reads are matched in uppercase. counts has the number of reads with an adapter, a poly-G tail and a poly-A tail, and the number 
+    of bases removed."""
+
+    def __init__(self, adapters = (), mismatches = 1, minoverlap = 3, polyg = None, polya = None, k = KMER):
+        self.adapters = [ADAPTERS.get(adapter.lower(), adapter).upper() for adapter in adapters]
+        self.mismatches = mismatches
+        self.minoverlap = minoverlap
+        self.polyg = polyg
+        self.polya = polya
+        self.k = k
+        self.counts = [0, 0, 0, 0]
+
+        # index of the k-mers that do not overlap in each adapter, with the adapters and offsets they are found at
+        self.index = {}
+        for a, adapter in enumerate(self.adapters):
+            for offset in range(0, len(adapter) - k + 1, k):
+                self.index.setdefault(adapter[offset:offset + k], []).append((a, offset))
+        for hits in self.index.values():
+            hits.sort(key = lambda hit: hit[1])
+        # adapters without a whole k-mer, which may not have mismatches
+        self.short = [adapter for adapter in self.adapters if len(adapter) < k]
+
+    def allowed(self, length):
+        """Returns the number of mismatches allowed in a match of the given length."""
+        return max(0, min(self.mismatches, length // self.k - 1))
+
+    def find_adapter(self, seq):
+        """Returns the start of the first adapter in the sequence, or its length if there is none."""
+        n = best = len(seq)
+        for kmer, hits in self.index.items():
+            pos = seq.find(kmer)
+            while pos != -1 and pos - hits[-1][1] < best:
+                for a, offset in hits:
+                    start = pos - offset
+                    if 0 <= start < best:
+                        adapter = self.adapters[a]
+                        length = min(len(adapter), n - start)
+                        if sum(x != y for x, y in zip(seq[start:start + length], adapter)) <= self.allowed(length):
+                            best = start
+                pos = seq.find(kmer, pos + 1)
+        for adapter in self.short:
+            pos = seq.find(adapter, 0, best + len(adapter) - 1)
+            if pos != -1:
+                best = pos
+
+        # an adapter that only starts at the end of the read, with less than k bases
+        for adapter in self.adapters:
+            for length in range(min(self.k - 1, len(adapter), n), self.minoverlap - 1, -1):
+                if n - length >= best:
+                    break
+                if seq.endswith(adapter[:length]):
+                    best = n - length
+                    break
+        return best
+
+    def tail(self, seq, base):
+        """Returns the length of the tail of the sequence made of the base, with mismatches allowed like in adapters."""
+        rest = seq.rstrip(base)
+        used = 0
+        while rest and used < self.mismatches:
+            longer = rest[:-1].rstrip(base)
+            if len(longer) == len(rest) - 1 or self.allowed(len(seq) - len(longer)) <= used:
+                break
+            rest, used = longer, used + 1
+        return len(seq) - len(rest)
+
+    def cut(self, seq):
+        """Returns where the read is cut, after removing the first adapter and everything after it, then a poly-G tail and a poly-A tail."""
+        n = end = len(seq)
+        if not seq.isupper():
+            seq = seq.upper()
+        if self.adapters:
+            end = self.find_adapter(seq)
+            if end < n:
+                self.counts[0] += 1
+        for i, base, minlength in ((1, 'G', self.polyg), (2, 'A', self.polya)):
+            if minlength is not None and end:
+                length = self.tail(seq[:end] if end < n else seq, base)
+                if length >= minlength:
+                    end -= length
+                    self.counts[i] += 1
+        self.counts[3] += n - end
+        return end
+
+
+def entry_adapters(args):
+    """Returns the AdapterTrimmer of the arguments or TrimConfig, or None when adapters and tails are not trimmed."""
+    return getattr(args, 'adapters', None)
+
+
+def adapter_log(adapters):
+    """Returns the lines of the log with the counts of an AdapterTrimmer."""
+    withadapter, polyg, polya, removed = adapters.counts
+    return [f"Number of entries with an adapter trimmed: {withadapter} \n", 
+            f"Number of entries with a poly-G tail trimmed: {polyg} \n", 
+            f"Number of entries with a poly-A tail trimmed: {polya} \n", 
+            f"Number of bases removed with adapters and tails: {removed} \n"]
+
+
+def write_log(kept, invalphred, invalentry, lowqual, overtrim, fileformat, logfile, truncated = False, adapters = None, dedup = None): 
     """A log file is written, containing information such as the number of reads kept and discarded"""
     try:
         with open(logfile, 'w') as lf: 
-            lf.write(f"The input file is a {'gzip' if zipped else 'fastq'} file \n")
-            lf.write(f"Total number of entries: {kept + invalphred + invalentry + lowqual + overtrim} \n")
+            lf.write(f"The input file is a {fileformat} file \n")
+            duplicates = dedup.duplicates if dedup is not None else 0
+            lf.write(f"Total number of entries: {kept + invalphred + invalentry + lowqual + overtrim + duplicates} \n")
             lf.write(f"Number of trimmed entries: {kept} \n")
             lf.write(f"Number of entries with invalid phred quality: {invalphred} \n")
             lf.write(f"Number of invalid entries: {invalentry} \n")
             lf.write(f"Number of entries removed because of low quality after trimming (low mean quality, short length, N content): {lowqual} \n")
             lf.write(f"Number of entries removed because of invalid trimming parameters: {overtrim} \n")
+            if adapters is not None:
+                lf.writelines(adapter_log(adapters))
+            if dedup is not None:
+                lf.writelines(dedup.log())
+            if truncated:
+                lf.write(f"The last entry of the input file is truncated, and is counted as an invalid entry \n")
 
     except FileNotFoundError:
         print(f"Input file not found.")
@@ -202,79 +363,1681 @@ def write_log(kept, invalphred, invalentry, lowqual, overtrim, zipped, logfile):
         print(f"An error occurred: {e}")
 
 
-def main_process(entry, kept_reads, inval_phred, inval_entry, low_qual, overtrim, zipped, o):
-    """Takes one entry at the time, and completes the process of checking and trimming, keeping track of how many entries are being kept, 
-    and how many are being discarded, and write valid entries to outputfile"""
+def write_pair_log(counts1, counts2, paircounts, fileformats, logfile, truncated = False, adapters = None, dedup = None):
+    """A log file is written in paired-end mode, containing the number of pairs kept and removed, and the number of entries kept and discarded in each input file"""
+    try:
+        with open(logfile, 'w') as lf:
+            lf.write(f"The input files are {fileformats[0]} and {fileformats[1]} files \n")
+            lf.write(f"Total number of pairs: {sum(paircounts) + (dedup.duplicates if dedup is not None else 0)} \n")
+            lf.write(f"Number of kept pairs: {paircounts[0]} \n")
+            lf.write(f"Number of pairs where only the first entry is kept: {paircounts[1]} \n")
+            lf.write(f"Number of pairs where only the second entry is kept: {paircounts[2]} \n")
+            lf.write(f"Number of pairs where both entries are removed: {paircounts[3]} \n")
+            if dedup is not None:
+                lf.writelines(dedup.log('pairs'))
+            for name, (kept, invalphred, invalentry, lowqual, overtrim) in (("first", counts1), ("second", counts2)):
+                lf.write(f"Entries in the {name} input file: \n")
+                lf.write(f"Number of trimmed entries: {kept} \n")
+                lf.write(f"Number of entries with invalid phred quality: {invalphred} \n")
+                lf.write(f"Number of invalid entries: {invalentry} \n")
+                lf.write(f"Number of entries removed because of low quality after trimming (low mean quality, short length, N content): {lowqual} \n")
+                lf.write(f"Number of entries removed because of invalid trimming parameters: {overtrim} \n")
+            if adapters is not None:
+                lf.write(f"Adapters and tails in both input files: \n")
+                lf.writelines(adapter_log(adapters))
+            if truncated:
+                lf.write(f"The last entry of an input file is truncated, and is counted as an invalid entry \n")
 
-    # check entry is valid
-    if control_entry(entry) is True:
-        Qlist = convert_phred(entry[3], args.phred)
-    
-        # check that the enrty has a valid phred encoding
-        if isinstance(Qlist, list):
-            trimmedentry = trim(entry, Qlist, trimtype = args.trimtype, thres3 = args.thres3, thres5 = args.thres5, mw = args.movwin)
-
-            # check that all trimming parameters are valid
-            if isinstance(trimmedentry, list): 
-                trimmedQlist = convert_phred(trimmedentry[3], args.phred)
-                
-                # check that the trimmed read satisfies the input requirements
-                if postprocess(entry, trimmedQlist, args.minlen, args.minqual, args.maxN):
-                    kept_reads += 1 #kept trimmed entry
-                    
-                    # write entry to output file
-                    for line in trimmedentry:
-                        o.write(line + "\n")
+    except FileNotFoundError:
+        print(f"Input file not found.")
+    except PermissionError:
+        print(f"Permission denied for input file.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+
+class Progress:
+    """Reports the number of processed entries, entries per second and bytes per second, every given number of entries and/or seconds, 
+    to stderr or to a progress file."""
+
+    def __init__(self, every = None, interval = None, progressfile = None):
+        self.every = every
+        self.interval = interval
+        self.out = open(progressfile, 'w') if progressfile else sys.stderr
+        self.entries = 0
+        self.bytes = 0
+        self.start = self.last = time.monotonic()
+        self.next = every
+
+    def update(self, entries, nbytes = 0):
+        """Adds the processed entries and bytes, and writes a report when it is due."""
+        self.entries += entries
+        self.bytes += nbytes
+        if self.every is not None and self.entries >= self.next:
+            self.next = (self.entries // self.every + 1) * self.every
+            self.report()
+        elif self.interval is not None and time.monotonic() - self.last >= self.interval:
+            self.report()
+
+    def report(self):
+        """Writes one line with the progress so far."""
+        now = time.monotonic()
+        elapsed = max(now - self.start, 1e-9)
+        self.last = now
+        self.out.write(f"{elapsed:.1f}s: {self.entries} entries, {self.bytes / 1e6:.1f} MB, {self.entries / elapsed:.0f} entries/s, {self.bytes / elapsed / 1e6:.2f} MB/s\n")
+        self.out.flush()
+
+    def close(self):
+        """Writes the final report, and closes the progress file."""
+        self.report()
+        if self.out is not sys.stderr:
+            self.out.close()
+
+
+class TimedFile:
+    """Wraps an input or output file, adding the time of every read() or write() and the number of bytes to a stage of a Profiler."""
+
+    def __init__(self, f, profiler, stage):
+        self.f = f
+        self.profiler = profiler
+        self.stage = stage
+
+    def read(self, size = -1):
+        start = time.perf_counter()
+        block = self.f.read(size)
+        self.profiler.add(self.stage, start)
+        self.profiler.bytes[self.stage] += len(block)
+        return block
+
+    def write(self, data):
+        start = time.perf_counter()
+        self.f.write(data)
+        self.profiler.add(self.stage, start)
+        self.profiler.bytes[self.stage] += len(data)
+
+
+class Profiler:
+    """Records the wall time and number of calls of each stage, the bytes read and written, the peak memory use, and histograms of the read 
+    length and mean quality before and after trimming, and writes them as a JSON or TSV report."""
+
+    def __init__(self, timing = True):
+        self.timing = timing
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.bytes = defaultdict(int)
+        self.histograms = {name: Counter() for name in ('length_before', 'length_after', 'quality_before', 'quality_after')}
+        self.start = self.last = time.perf_counter()
+
+    def add(self, stage, start, excluded = 0.0):
+        """Adds one call and the time since start, less the excluded time, to a stage. Returns the current time."""
+        now = time.perf_counter()
+        self.calls[stage] += 1
+        self.seconds[stage] += now - start - excluded
+        return now
+
+    def lap(self, stage = None, excluded = 0.0):
+        """Adds the time since the last lap, less the excluded time, to a stage, or only starts a new lap if no stage is given. 
+        A Profiler made without timing only makes histograms, and its laps do nothing."""
+        if not self.timing:
+            return
+        self.last = time.perf_counter() if stage is None else self.add(stage, self.last, excluded)
+
+    def timed(self, iterable, stage, exclude = ()):
+        """Yields the items of an iterable, adding the time taken to get each one to a stage, less the time added meanwhile to the excluded stages."""
+        iterator = iter(iterable)
+        while True:
+            before = sum(self.seconds[name] for name in exclude)
+            start = time.perf_counter()
+            item = next(iterator, None)
+            if item is None:
+                return
+            self.add(stage, start, sum(self.seconds[name] for name in exclude) - before)
+            yield item
+
+    def observe(self, when, Qlist):
+        """Adds the length and mean quality of one read to the histograms before or after trimming."""
+        if Qlist:
+            self.histograms['length_' + when][len(Qlist)] += 1
+            self.histograms['quality_' + when][sum(Qlist) // len(Qlist)] += 1
+
+    def observe_arrays(self, when, lengths, sums):
+        """Adds reads to the histograms before or after trimming, from arrays of their lengths and sums of quality scores, in batch mode."""
+        nonempty = lengths > 0
+        for name, values in (('length_', lengths[nonempty]), ('quality_', sums[nonempty] // lengths[nonempty])):
+            keys, counts = np.unique(values, return_counts = True)
+            self.histograms[name + when].update(dict(zip(keys.tolist(), counts.tolist())))
+
+    def merge(self, histograms):
+        """Adds the histograms made for a chunk, by a Profiler in a worker process."""
+        start = time.perf_counter()
+        for name, histogram in histograms.items():
+            self.histograms[name].update(histogram)
+        self.add('histograms', start)
+
+    def report(self, entries, inputs, outputs):
+        """Returns the report as a dictionary, with the counts of entries, and the sizes of the input and output files."""
+        stages = {stage: {'calls': self.calls[stage], 'seconds': round(self.seconds[stage], 6)} for stage in self.calls}
+        report = {'seconds': round(time.perf_counter() - self.start, 6), 'stages': stages, 'entries': entries}
+        report['bytes'] = {
+            'input': sum(os.path.getsize(name) for name in inputs if name != '-' and os.path.isfile(name)),
+            'input_uncompressed': self.bytes['decompress'],
+            'output': sum(os.path.getsize(name) for name in outputs if name != '-' and os.path.isfile(name)),
+            'output_uncompressed': self.bytes['compress']}
+
+        # ru_maxrss is in kilobytes on Linux, and the worker processes are only counted once they have ended
+        if resource is not None:
+            report['peak_rss_kb'] = {'main': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 
+                                     'workers': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss}
+        report['histograms'] = {name: {str(key): histogram[key] for key in sorted(histogram)} for name, histogram in self.histograms.items()}
+        return report
+
+    def write_report(self, filename, entries, inputs, outputs):
+        """Writes the report to a file, as TSV if its name ends with .tsv, else as JSON. TSV has one line per value, with the keys joined by dots."""
+        report = self.report(entries, inputs, outputs)
+        with open(filename, 'w') as out:
+            if not filename.endswith('.tsv'):
+                json.dump(report, out, indent = 2)
+                out.write('\n')
+                return
+
+            def rows(prefix, value):
+                if isinstance(value, dict):
+                    for key, item in value.items():
+                        yield from rows(f"{prefix}.{key}" if prefix else key, item)
                 else:
-                    low_qual += 1 #trimmed entry did not satisfy input requirments
+                    yield f"{prefix}\t{value}\n"
+            out.write("key\tvalue\n")
+            out.writelines(rows('', report))
+
+
+# Categories of entries, in the same order as the counts
+KEPT, INVAL_PHRED, INVAL_ENTRY, LOW_QUAL, OVERTRIM = range(5)
+COUNT_NAMES = ('kept', 'inval_phred', 'inval_entry', 'low_qual', 'overtrim')
+PAIR_COUNT_NAMES = ('kept', 'only_first', 'only_second', 'removed')
+
+
+def trim_entry(entry, start, end):
+    """Returns the sequence and quality line of an entry from start to end, as a Record if the entry is a Record, else as a list."""
+    if isinstance(entry, Record):
+        return Record(entry[0], entry[1][start:end], entry[2], entry[3][start:end])
+    return [entry[0], entry[1][start:end], entry[2], entry[3][start:end]]
+
+
+def check_entry(entry, args, profiler = None):
+    """Checks and trims one entry. Returns the category of the entry, and the trimmed entry if it is kept, else None. With a Profiler, 
+    the time of each step is added to its stage, and the read is added to the histograms before and after trimming."""
+    if profiler is not None:
+        profiler.lap()
+
+    # check entry is valid, or only its lengths if validation is skipped for trusted input
+    bases = entry_bases(args)
+    valid = control_entry(entry, bases)
+    if profiler is not None:
+        profiler.lap('control')
+    if not valid:
+        return INVAL_ENTRY, None #entry is invalid
+
+    # check that the enrty has a valid phred encoding
+    Qlist = convert_phred(entry[3], args.phred)
+    if profiler is not None:
+        profiler.lap('decode')
+    if not isinstance(Qlist, list):
+        return INVAL_PHRED, None #phred is invalid
+    if profiler is not None:
+        profiler.observe('before', Qlist)
+        profiler.lap('histograms')
+
+    # adapters and poly-G/poly-A tails are cut off first, and a read that is all adapter is removed
+    adapters = entry_adapters(args)
+    if adapters is not None:
+        end = adapters.cut(entry[1])
+        if profiler is not None:
+            profiler.lap('adapter')
+        if end == 0:
+            return LOW_QUAL, None
+        if end < len(Qlist):
+            entry, Qlist = trim_entry(entry, 0, end), Qlist[:end]
+
+    # check that all trimming parameters are valid
+    bounds = trim_bounds(len(entry[1]), Qlist, trimtype = args.trimtype, thres3 = args.thres3, thres5 = args.thres5, mw = args.movwin)
+    if profiler is not None:
+        profiler.lap('trim')
+    if bounds is False:
+        return OVERTRIM, None #attempting to trim over entry's length
+
+    # the quality scores are converted once, and sliced like the entry
+    start, end = bounds
+    trimmedentry = trim_entry(entry, start, end)
+    trimmedQlist = Qlist[start:end]
+
+    # check that the trimmed read satisfies the input requirements
+    passed = postprocess(trimmedentry, trimmedQlist, args.minlen, args.minqual, args.maxN)
+    if profiler is not None:
+        profiler.lap('postprocess')
+    if not passed:
+        return LOW_QUAL, None #trimmed entry did not satisfy input requirments
+    if profiler is not None:
+        profiler.observe('after', trimmedQlist)
+        profiler.lap('histograms')
+    return KEPT, trimmedentry #kept trimmed entry
+
+
+def main_process(entry, kept_reads, inval_phred, inval_entry, low_qual, overtrim, fileformat, o, args):
+    """Takes one entry at the time, and completes the process of checking and trimming with the given arguments or TrimConfig, keeping track 
+    of how many entries are being kept, and how many are being discarded, and write valid entries to outputfile"""
+    category, trimmedentry = check_entry(entry, args)
+
+    if category == KEPT:
+        kept_reads += 1
+
+        # write entry to output file
+        for line in trimmedentry:
+            o.write(line + "\n")
+    elif category == LOW_QUAL:
+        low_qual += 1
+    elif category == OVERTRIM:
+        overtrim += 1
+    elif category == INVAL_PHRED:
+        inval_phred += 1
+    else:
+        inval_entry += 1
+
+    return kept_reads, inval_phred, inval_entry, low_qual, overtrim, fileformat
+
+
+def _segments_with(mask, offsets):
+    """Returns whether each line of a joined array, starting at the offsets, has a True value in the mask. Only the True values are looked up, 
+    so it is fast when they are rare, like invalid bases."""
+    found = np.zeros(len(offsets), dtype=bool)
+    found[np.searchsorted(offsets, np.flatnonzero(mask), side='right') - 1] = True
+    return found
+
+
+def _segment_counts(mask, offsets, starts, ends):
+    """Counts the True values of the mask in the part [start, end) of each line of a joined array, starting at the offsets."""
+    positions = np.flatnonzero(mask)
+    lines = np.searchsorted(offsets, positions, side='right') - 1
+    positions -= offsets[lines]
+    inside = (positions >= starts[lines]) & (positions < ends[lines])
+    return np.bincount(lines[inside], minlength=len(offsets))
+
+
+def _join_lines(lines):
+    """Joins lines into one uint8 array. Returns the array and a mask of the lines that are not ASCII, which have one placeholder byte per character."""
+    joined = ''.join(lines)
+    if joined.isascii():
+        return np.frombuffer(joined.encode('ascii'), dtype=np.uint8), np.zeros(len(lines), dtype=bool)
+    nonascii = np.fromiter((not line.isascii() for line in lines), dtype=bool, count=len(lines))
+    return np.frombuffer(joined.encode('latin-1', 'replace'), dtype=np.uint8), nonascii
+
+
+def _bases_table(bases):
+    """Returns a lookup table of the bases allowed by control_entry(), used in batch mode."""
+    table = np.zeros(256, dtype=bool)
+    table[list(bases)] = True
+    return table
+
+
+def batch_check(entries, args, profiler = None):
+    """Checks and trims a chunk of entries at once using NumPy arrays. Every entry gets the same result as in check_entry(). 
+    Returns an array with the category of each entry, and lists with the index of each kept entry, and the start and end of its trimmed part. 
+    With a Profiler, the reads are added to its histograms before and after trimming."""
+    n = len(entries)
+    headers = [entry[0] for entry in entries]
+    seqs = [entry[1] for entry in entries]
+    seps = [entry[2] for entry in entries]
+    quals = [entry[3] for entry in entries]
+
+    seqlen = np.fromiter(map(len, seqs), dtype=np.int64, count=n)
+    quallen = np.fromiter(map(len, quals), dtype=np.int64, count=n)
+    seqoff = np.concatenate(([0], np.cumsum(seqlen)[:-1])).astype(np.int64)
+    qualoff = np.concatenate(([0], np.cumsum(quallen)[:-1])).astype(np.int64)
+    seqbytes, seq_nonascii = _join_lines(seqs)
+    qualbytes, qual_nonascii = _join_lines(quals)
+
+    # check entries are valid, like control_entry(), and only their lengths if validation is skipped for trusted input
+    bases = entry_bases(args)
+    valid_entry = (seqlen == quallen) & (seqlen > 0)
+    if bases is not None:
+        valid_entry &= ~seq_nonascii
+        valid_entry &= np.fromiter((header[:1] == '@' for header in headers), dtype=bool, count=n)
+        valid_entry &= np.fromiter((sep[:1] == '+' for sep in seps), dtype=bool, count=n)
+        valid_entry &= ~_segments_with(~_bases_table(bases)[seqbytes], seqoff)
+
+    # check the phred encoding of the quality lines, like convert_phred()
+    in33 = ~_segments_with((qualbytes < 33) | (qualbytes > 75), qualoff)
+    in64 = ~_segments_with((qualbytes < 64) | (qualbytes > 106), qualoff)
+    if args.phred == 33:
+        valid_phred = in33
+    elif args.phred == 64:
+        valid_phred = in64
+    elif args.phred is None:
+        valid_phred = in33 | in64
+    else:
+        valid_phred = np.zeros(n, dtype=bool)
+    valid_phred &= ~qual_nonascii
+    encoding = np.where(in33, 33, 64) if args.phred is None else np.full(n, args.phred if args.phred in (33, 64) else 33)
+    ok = valid_entry & valid_phred
+    checked = ok.copy()
+
+    # adapters and poly-G/poly-A tails are cut off first, like in check_entry(), so the reads are shorter than their quality lines
+    readlen = quallen.copy()
+    adapters = entry_adapters(args)
+    if adapters is not None:
+        for i in np.flatnonzero(ok).tolist():
+            readlen[i] = adapters.cut(seqs[i])
+    alladapter = ok & (readlen == 0)
+    ok &= ~alladapter
+
+    # the decoded quality scores are summed once, and the sums of windows and trimmed reads are differences of this prefix sum
+    prefix = None
+    if args.trimtype == "Q" or args.minqual is not None or profiler is not None:
+        decoded = qualbytes.astype(np.int64) - np.repeat(encoding, quallen)
+        prefix = np.concatenate(([0], np.cumsum(decoded)))
+
+    # find the trimmed part [start, end) of every read, like trim()
+    start = np.zeros(n, dtype=np.int64)
+    end = readlen.copy()
+    if args.trimtype == "N":
+        overtrim = np.zeros(n, dtype=bool)
+
+        # the trimmed part only depends on the read length, so it is found once for each length
+        for length in np.unique(readlen[ok]).tolist():
+            bounds = trim_bounds(length, None, "N", thres3 = args.thres3, thres5 = args.thres5)
+            same = readlen == length
+            if bounds is False:
+                overtrim |= same
             else:
-                overtrim += 1 #attempting to trim over entry's length
+                start[same], end[same] = bounds
+
+    elif args.trimtype == "Q":
+        mw = 1 if args.movwin is None else args.movwin
+        total = len(qualbytes)
+
+        # mean quality of the moving window starting at every position, and whether the window fits inside its read
+        winmean = np.zeros(total)
+        if total >= mw:
+            winmean[:total - mw + 1] = (prefix[mw:] - prefix[:total - mw + 1]) / mw
+        fits = np.arange(total) - np.repeat(qualoff, quallen) <= np.repeat(readlen - mw, quallen)
+        last = qualoff + readlen - mw
+
+        # the 5' cut point is the first window with a mean quality not lower than the threshold
+        if args.thres5 is not None:
+            pos5 = np.flatnonzero(fits & ~(winmean < args.thres5))
+            idx = np.searchsorted(pos5, qualoff)
+            cand = pos5[np.minimum(idx, len(pos5) - 1)] if len(pos5) else np.zeros(n, dtype=np.int64)
+            found = (idx < len(pos5)) & (cand <= last)
+            start = np.where(found, cand - qualoff, readlen - mw + 1)
+
+        # the 3' cut point is the end of the last window with a mean quality not lower than the threshold, that does not pass the 5' cut point
+        if args.thres3 is not None:
+            pos3 = np.flatnonzero(fits & ~(winmean < args.thres3))
+            idx = np.searchsorted(pos3, last, side='right') - 1
+            cand = pos3[np.maximum(idx, 0)] if len(pos3) else np.zeros(n, dtype=np.int64)
+            found = (idx >= 0) & (cand >= qualoff + start)
+            end = np.where(found, cand - qualoff + mw, start + mw - 1)
+
+        overtrim = (readlen < mw) | (end - start < mw)
+
+    else:
+        raise ValueError("Trimtype should be N or Q.")
+
+    overtrim &= ok
+    trimmed = ok & ~overtrim
+    start = np.where(trimmed, start, 0)
+    end = np.where(trimmed, end, 0)
+    trimlen = end - start
+
+    # check that the trimmed reads satisfy the input requirements, like postprocess()
+    passed = trimmed.copy()
+    if args.minlen is not None:
+        passed &= ~(trimlen < args.minlen)
+    if args.minqual is not None:
+        qualsum = prefix[qualoff + end] - prefix[qualoff + start]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            passed &= ~(qualsum / trimlen < args.minqual)
+    if args.maxN is not None:
+        # N and n only differ in the bit 32, so both are counted at once
+        passed &= ~(_segment_counts((seqbytes | 32) == ord('n'), seqoff, start, end) > args.maxN)
+
+    # category of each entry, and the trimmed entries that are kept
+    categories = np.full(n, KEPT, dtype=np.int8)
+    categories[(trimmed & ~passed) | alladapter] = LOW_QUAL
+    categories[overtrim] = OVERTRIM
+    categories[valid_entry & ~valid_phred] = INVAL_PHRED
+    categories[~valid_entry] = INVAL_ENTRY
+
+    if profiler is not None:
+        histograms = time.perf_counter()
+        profiler.observe_arrays('before', quallen[checked], (prefix[qualoff + quallen] - prefix[qualoff])[checked])
+        profiler.observe_arrays('after', trimlen[passed], (prefix[qualoff + end] - prefix[qualoff + start])[passed])
+        profiler.add('histograms', histograms)
+    return categories, np.flatnonzero(passed).tolist(), start[passed].tolist(), end[passed].tolist()
+
+
+def batch_entries(entries, kept, starts, ends):
+    """Returns the kept entries of a chunk checked by batch_check(), trimmed like trim_entry()."""
+    return [trim_entry(entries[i], s, e) for i, s, e in zip(kept, starts, ends)]
+
+
+def batch_text(entries, kept, starts, ends):
+    """Returns the kept entries of a chunk checked by batch_check() as text, trimmed from their lines without making an entry for each one."""
+    return ''.join([f"{header}\n{seq[s:e]}\n{sep}\n{qual[s:e]}\n" for (header, seq, sep, qual), s, e in zip(map(entries.__getitem__, kept), starts, ends)])
+
+
+def batch_process(entries, args):
+    """Checks and trims a chunk of entries at once using NumPy arrays, with the same result as main_process() for every entry. 
+    Returns the list of trimmed entries that are kept, and the number of kept, invalid phred, invalid, low quality and overtrimmed entries."""
+    categories, *kept = batch_check(entries, args)
+    return batch_entries(entries, *kept), tuple(np.bincount(categories, minlength = 5).tolist())
+
+
+# Number of entries in each chunk given to a worker process, when batch size is not given
+CHUNKSIZE = 10000
+
+# Number of bytes read from the input file, and written to the output file, at once
+BLOCKSIZE = 1 << 20
+
+
+class FastqReader:
+    """Reads entries from a binary FASTQ file in large blocks, and splits the blocks into Records of four stripped lines. Entries can span 
+    two blocks. Lines are decoded as latin-1, so every byte is one character, and is written back unchanged by FastqWriter."""
+
+    def __init__(self, f, blocksize = BLOCKSIZE):
+        self.f = f
+        self.blocksize = blocksize
+        self.truncated = False
+
+    def __iter__(self):
+        rest = ''
+        while True:
+            block = self.f.read(self.blocksize)
+            if not block:
+                break
+
+            # the last, unfinished line and any lines of an unfinished entry are kept for the next block
+            lines = (rest + block.decode('latin-1')).split('\n')
+            rest = lines.pop()
+            complete = len(lines) - len(lines) % 4
+            if complete < len(lines):
+                rest = '\n'.join(lines[complete:] + [rest])
+                del lines[complete:]
+
+            # entries are made from every fourth line, up to an entry with an empty first line, which means we've reached the end of the file
+            lines = [line.strip() for line in lines]
+            headers = lines[0::4]
+            if '' in headers:
+                yield from map(Record, headers[:headers.index('')], lines[1::4], lines[2::4], lines[3::4])
+                return
+            yield from map(Record, headers, lines[1::4], lines[2::4], lines[3::4])
+
+        # the end of the file, where the last line may not end with a newline
+        lines = [line.strip() for line in rest.split('\n')] if rest else []
+        if lines and lines[-1] == '':
+            lines.pop()
+        if len(lines) >= 4 and lines[0] != '':
+            yield Record(*lines[:4])
+            del lines[:4]
+
+        # an entry with less than four lines is truncated, and is padded with empty lines, so it is counted as an invalid entry
+        if lines and lines[0] != '':
+            self.truncated = True
+            yield Record(*lines, *[''] * (4 - len(lines)))
+
+
+class FastqWriter:
+    """Collects the text written to it, and writes it to the binary output file in large blocks."""
+
+    def __init__(self, o, blocksize = BLOCKSIZE):
+        self.o = o
+        self.blocksize = blocksize
+        self.buffer = []
+        self.size = 0
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= self.blocksize:
+            self.flush()
+
+    def write_record(self, record):
+        """Writes one entry."""
+        self.write(f"{record[0]}\n{record[1]}\n{record[2]}\n{record[3]}\n")
+
+    def flush(self):
+        """Writes the collected text to the output file."""
+        if self.buffer:
+            self.o.write(''.join(self.buffer).encode('latin-1'))
+            self.buffer = []
+            self.size = 0
+
+
+class ThreadedReader:
+    """Reads blocks from a file in a background thread, so decompression of the input runs while entries are processed. 
+    read() returns the next block, whatever size is asked for."""
+
+    def __init__(self, f, blocksize = BLOCKSIZE, queuesize = 4):
+        self.f = f
+        self.blocksize = blocksize
+        self.queue = queue.Queue(queuesize)
+        self.done = self.stop = False
+        self.thread = threading.Thread(target = self._run, daemon = True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            while not self.stop:
+                block = self.f.read(self.blocksize)
+                self.queue.put(block)
+                if not block:
+                    return
+        except Exception as e:
+            self.queue.put(e)
+
+    def read(self, size = -1):
+        if self.done:
+            return b''
+        block = self.queue.get()
+        if isinstance(block, Exception):
+            self.done = True
+            raise block
+        if not block:
+            self.done = True
+        return block
+
+    def close(self):
+        # the background thread may be waiting for room in the queue
+        self.stop = True
+        while self.thread.is_alive():
+            try:
+                self.queue.get(timeout = 0.1)
+            except queue.Empty:
+                pass
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParallelGzipWriter:
+    """Compresses blocks of output as independent gzip members in a pool of threads, and writes them to the output file in order. 
+    Concatenated gzip members are a valid gzip file, so the output can be read by gzip, zcat and other gzip tools."""
+
+    def __init__(self, o, level = 9, threads = 2, compress = gzip.compress, trailer = b'', blocksize = BLOCKSIZE):
+        self.o = o
+        self.level = level
+        self.compress = compress
+        self.trailer = trailer
+        self.threads = threads
+        self.blocksize = blocksize
+        self.buffer = bytearray()
+        self.pending = deque()
+        self.written = False
+        self.pool = ThreadPoolExecutor(threads)
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= self.blocksize:
+            self._submit()
+        return len(data)
+
+    def _submit(self):
+        # zlib releases the GIL while compressing, so the blocks are compressed in parallel
+        self.pending.append(self.pool.submit(self.compress, bytes(self.buffer), self.level))
+        self.buffer = bytearray()
+        while len(self.pending) > 2 * self.threads:
+            self._write_member()
+
+    def _write_member(self):
+        self.o.write(self.pending.popleft().result())
+        self.written = True
+
+    def close(self):
+        if self.buffer or not self.written and not self.pending:
+            self._submit()
+        while self.pending:
+            self._write_member()
+        self.o.write(self.trailer)
+        self.pool.shutdown()
+        self.o.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CodecProcess:
+    """Runs an external compression program, such as pigz, igzip or zstd. Without an output file, the program writes the decompressed input 
+    to a pipe that is read from. With an output file, the output is written to the program through a pipe, and it writes the compressed output."""
+
+    def __init__(self, command, output = None):
+        self.output = output
+        if output is None:
+            self.proc = subprocess.Popen(command, stdout = subprocess.PIPE)
+            self.pipe = self.proc.stdout
         else:
-            inval_phred += 1 #phred is invalid
+            self.proc = subprocess.Popen(command, stdin = subprocess.PIPE, stdout = output)
+            self.pipe = self.proc.stdin
+
+    def read(self, size = -1):
+        return self.pipe.read(size)
+
+    def write(self, data):
+        return self.pipe.write(data)
+
+    def close(self):
+        self.pipe.close()
+        returncode = self.proc.wait()
+        if self.output is not None:
+            self.output.close()
+        if returncode != 0:
+            raise OSError(f"{self.proc.args[0]} exited with code {returncode}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CodecFile:
+    """A compressed stream on top of a binary file, that closes both the stream and the file."""
+
+    def __init__(self, stream, raw):
+        self.stream = stream
+        self.raw = raw
+
+    def read(self, size = -1):
+        return self.stream.read(size)
+
+    def write(self, data):
+        return self.stream.write(data)
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# BGZF files are gzip files of blocks of at most 64 KB, with the size of each block in an extra field, and an empty block at the end
+BGZF_BLOCKSIZE = 65280
+BGZF_EOF = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+
+def bgzf_compress(data, level = 9):
+    """Compresses data into BGZF blocks."""
+    blocks = []
+    for i in range(0, len(data), BGZF_BLOCKSIZE):
+        block = data[i:i + BGZF_BLOCKSIZE]
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        deflated = compressor.compress(block) + compressor.flush()
+        header = b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff' + struct.pack('<HBBHH', 6, ord('B'), ord('C'), 2, len(deflated) + 25)
+        blocks.append(header + deflated + struct.pack('<II', zlib.crc32(block), len(block)))
+    return b''.join(blocks)
+
+
+# Default compression level of each output format
+COMPRESSION_LEVELS = {'gzip': 9, 'bgzf': 9, 'bzip2': 9, 'xz': 6, 'zstd': 3}
+
+# Output formats given by the extension of the output file
+OUTPUT_EXTENSIONS = {'.gz': 'gzip', '.gzip': 'gzip', '.bgz': 'bgzf', '.bz2': 'bzip2', '.xz': 'xz', '.zst': 'zstd'}
+
+
+def detect_format(head):
+    """Detects the format of a file from its first bytes. Returns gzip, bgzf, bzip2, xz, zstd or fastq."""
+    if head[:2] == b'\x1f\x8b':
+        return 'bgzf' if head[3:4] == b'\x04' and head[12:14] == b'BC' else 'gzip'
+    if head[:3] == b'BZh':
+        return 'bzip2'
+    if head[:6] == b'\xfd7zXZ\x00':
+        return 'xz'
+    if head[:4] == b'\x28\xb5\x2f\xfd':
+        return 'zstd'
+    return 'fastq'
+
+
+def output_format(filename, args):
+    """Returns the format of the output file, given by --outformat, or else by the extension of the output file. Other files and stdout are fastq."""
+    if args.outformat:
+        return args.outformat
+    for extension, fileformat in OUTPUT_EXTENSIONS.items():
+        if filename.endswith(extension):
+            return fileformat
+    return 'fastq'
+
+
+def external_gzip():
+    """Returns the path of pigz or igzip if one is found on PATH, else None."""
+    return shutil.which('pigz') or shutil.which('igzip')
+
+
+def open_input(filename, args):
+    """Opens the input file, or stdin if the filename is '-', and detects its format from the first bytes. 
+    Returns a binary file object with the decompressed input, and the format of the input file."""
+    raw = open(sys.stdin.fileno(), 'rb', closefd = False) if filename == '-' else open(filename, 'rb')
+    fileformat = detect_format(raw.peek(18)[:18])
+
+    # external programs are only used for named files, since the first bytes of stdin have already been read
+    if fileformat in ('gzip', 'bgzf'):
+        program = external_gzip() if args.external and filename != '-' else None
+        if program is not None:
+            raw.close()
+            f = CodecProcess([program, '-dc', filename])
+        else:
+            f = CodecFile(gzip.GzipFile(fileobj = raw, mode = 'rb'), raw)
+    elif fileformat == 'bzip2':
+        f = CodecFile(bz2.BZ2File(raw, 'rb'), raw)
+    elif fileformat == 'xz':
+        f = CodecFile(lzma.LZMAFile(raw, 'rb'), raw)
+    elif fileformat == 'zstd':
+        if zstandard is not None:
+            f = CodecFile(zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames = True), raw)
+        elif shutil.which('zstd') and filename != '-':
+            raw.close()
+            f = CodecProcess([shutil.which('zstd'), '-dc', filename])
+        else:
+            raw.close()
+            raise OSError("Reading zstd files needs the zstandard module, or the zstd program for named files.")
+    else:
+        return raw, fileformat
+
+    # the input is decompressed in a background thread if compression threads are given
+    if args.compthreads:
+        f = ThreadedReader(f)
+    return f, fileformat
+
+
+def open_output(filename, args, append = False):
+    """Opens the output file, or stdout if the filename is '-', in the output format. Compressed output uses an external program 
+    if asked for and found, and compression threads if given. When appending, compressed output starts a new gzip member, or bzip2, 
+    xz or zstd stream, which tools read as part of the same file. Returns a binary file object."""
+    fileformat = output_format(filename, args)
+    raw = open(sys.__stdout__.fileno(), 'wb', closefd = False) if filename == '-' else open(filename, 'ab' if append else 'wb')
+    level = COMPRESSION_LEVELS.get(fileformat) if args.complevel is None else args.complevel
+    threads = args.compthreads or 1
+
+    if fileformat == 'gzip':
+        program = external_gzip() if args.external else None
+        if program is not None:
+            # igzip only has the compression levels 0 to 3
+            command = [program, '-p' if program.endswith('pigz') else '-T', str(threads), f"-{level if program.endswith('pigz') else min(level, 3)}", '-c']
+            return CodecProcess(command, raw)
+        if args.compthreads:
+            return ParallelGzipWriter(raw, level, threads)
+        return CodecFile(gzip.GzipFile(fileobj = raw, mode = 'wb', compresslevel = level), raw)
+    if fileformat == 'bgzf':
+        return ParallelGzipWriter(raw, level, threads, bgzf_compress, BGZF_EOF)
+    if fileformat == 'bzip2':
+        return CodecFile(bz2.BZ2File(raw, 'wb', compresslevel = max(level, 1)), raw)
+    if fileformat == 'xz':
+        return CodecFile(lzma.LZMAFile(raw, 'wb', preset = level), raw)
+    if fileformat == 'zstd':
+        if zstandard is not None:
+            return CodecFile(zstandard.ZstdCompressor(level = level, threads = args.compthreads or 0).stream_writer(raw), raw)
+        if shutil.which('zstd'):
+            return CodecProcess([shutil.which('zstd'), f"-{max(level, 1)}", f"-T{threads}", '-c'], raw)
+        raw.close()
+        raise OSError("Writing zstd files needs the zstandard module or the zstd program.")
+    return raw
+
+
+def read_chunks(entries, size):
+    """Splits the entries from a FastqReader into chunks of the given number of entries."""
+    entries = iter(entries)
+    while True:
+        chunk = list(itertools.islice(entries, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_chunk(entries, args, profiler = None):
+    """Processes a chunk of entries, in batch mode if batch size is given. Returns the kept entries as text, and the number of kept, 
+    invalid phred, invalid, low quality and overtrimmed entries. With a Profiler, the reads are added to its histograms."""
+    if args.batchsize:
+        categories, *kept = batch_check(entries, args, profiler)
+        return batch_text(entries, *kept), tuple(np.bincount(categories, minlength = 5).tolist())
+
+    kept, counts = [], [0] * 5
+    for entry in entries:
+        category, trimmedentry = check_entry(entry, args, profiler)
+        counts[category] += 1
+        if trimmedentry is not None:
+            kept.append(trimmedentry)
+    return ''.join([f"{header}\n{seq}\n{sep}\n{qual}\n" for header, seq, sep, qual in kept]), tuple(counts)
+
+
+def process_in_worker(func, entries, args, profile = False, size = None):
+    """Runs func on a chunk in a worker process. The adapter counts of the chunk are returned with the result, as the AdapterTrimmer 
+    of the worker is a copy of the one in the main process, and when profiling, the histograms of the chunk, made by a Profiler of the worker. 
+    With a size function, the size of the chunk in the input file is returned too."""
+    adapters = entry_adapters(args)
+    if adapters is not None:
+        adapters.counts = [0] * len(adapters.counts)
+    profiler = Profiler(timing = False) if profile else None
+    result = func(entries, args, profiler)
+    return (result, size(entries) if size is not None else 0, adapters.counts if adapters is not None else None, 
+            profiler.histograms if profiler is not None else None)
+
+
+def process_parallel(chunks, args, func = process_chunk, profiler = None, pool = None, size = None):
+    """Processes chunks of entries with process_chunk(), or the given function, in a pool of worker processes, and yields the results in 
+    the original order of the chunks, with the size of each chunk given by the size function, or 0. At most two chunks per worker are in flight, 
+    so memory use does not depend on the size of the input file. With a Profiler, the histograms of every chunk are added to it. The pool is 
+    made for the chunks, unless one is given that is kept open."""
+    adapters = entry_adapters(args)
+
+    def results(pending):
+        result, nbytes, counts, histograms = pending.popleft().get()
+        if adapters is not None:
+            adapters.counts = [a + b for a, b in zip(adapters.counts, counts)]
+        if profiler is not None:
+            profiler.merge(histograms)
+        return result, nbytes
+
+    with contextlib.ExitStack() as stack:
+        if pool is None:
+            pool = stack.enter_context(multiprocessing.Pool(args.threads))
+        pending = deque()
+        for entries in chunks:
+            pending.append(pool.apply_async(process_in_worker, (func, entries, args, profiler is not None, size)))
+            if len(pending) >= 2 * args.threads:
+                yield results(pending)
+        while pending:
+            yield results(pending)
+
+
+def entry_bytes(entries):
+    """Returns the size of the entries in the input file, counting one newline per line."""
+    return sum(len(line) + 1 for entry in entries for line in entry)
+
+
+# Approximate memory of one hash in the set of exact deduplication, with its int object and its slots in the set
+HASH_BYTES = 64
+
+
+class Deduplicator:
+    """Removes the kept entries, or pairs of entries, whose trimmed sequences were already written, keyed on a 64-bit digest of the sequences. 
+    The digests are kept in a set in exact mode, until it would use half of the memory cap, and in a Bloom filter after that or in bloom mode."""
+
+    def __init__(self, mode = 'exact', memory = None, fprate = 0.001):
+        if mode not in ('exact', 'bloom'):
+            raise ValueError("Dedup mode should be exact or bloom.")
+        if memory is None and mode == 'bloom':
+            raise ValueError("A Bloom filter needs a memory cap.")
+        if memory is not None and memory < 2:
+            raise ValueError("The memory cap of deduplication should be at least 2 bytes.")
+        if not 0 < fprate < 1:
+            raise ValueError("The false-positive rate should be between 0 and 1.")
+        self.memory = memory
+        self.fprate = fprate
+        self.duplicates = 0
+        self.hashes = set()
+        self.bits = None
+        if mode == 'bloom':
+            self.make_filter(memory)
+
+    def make_filter(self, nbytes):
+        """Replaces the set of hashes with a Bloom filter of the given size, holding the same hashes."""
+        self.bits = bytearray(nbytes)
+        self.nbits = nbytes * 8
+        self.setbits = 0
+        self.k = max(1, math.ceil(-math.log2(self.fprate)))
+        self.capacity = int(self.nbits * math.log(2) / self.k)
+        hashes, self.hashes = self.hashes, None
+        for h in hashes:
+            self.seen_hash(h)
+
+    def seen(self, key):
+        """Adds the trimmed sequence of an entry, or a tuple of the sequences of a pair, and returns whether it is a duplicate."""
+        # a digest instead of hash(), which is salted for every process, so the same reads are removed in every run
+        if not isinstance(key, str):
+            key = '\n'.join(key)
+        duplicate = self.seen_hash(int.from_bytes(hashlib.blake2b(key.encode('latin-1'), digest_size = 8).digest(), 'little'))
+        self.duplicates += duplicate
+        return duplicate
+
+    def seen_hash(self, h):
+        """Adds a hash, and returns whether it was seen before."""
+        if self.bits is None:
+            if h in self.hashes:
+                return True
+            self.hashes.add(h)
+            if self.memory is not None and len(self.hashes) * HASH_BYTES > self.memory // 2:
+                self.make_filter(self.memory // 2)
+            return False
+
+        # k positions in the Bloom filter from two 64-bit hashes
+        bits, nbits = self.bits, self.nbits
+        h2 = ((h >> 17) | (h << 47)) & 0xFFFFFFFFFFFFFFFF | 1
+        found = True
+        for i in range(self.k):
+            position = (h + i * h2) % nbits
+            byte, bit = position >> 3, 1 << (position & 7)
+            if not bits[byte] & bit:
+                bits[byte] |= bit
+                self.setbits += 1
+                found = False
+        return found
+
+    def filter(self, *texts):
+        """Removes the duplicates from the text of the kept entries, or from the texts of the two files of the kept pairs, which have their 
+        entries in the same order. Returns the texts without the duplicates, and the number of duplicates."""
+        lines = [text.split('\n') for text in texts]
+        keys = lines[0][1::4] if len(texts) == 1 else zip(*(textlines[1::4] for textlines in lines))
+        keep = [not self.seen(key) for key in keys]
+        duplicates = keep.count(False)
+        if not duplicates:
+            return texts, 0
+        return tuple(''.join(f"{textlines[4 * i]}\n{textlines[4 * i + 1]}\n{textlines[4 * i + 2]}\n{textlines[4 * i + 3]}\n" 
+                             for i, kept in enumerate(keep) if kept) for textlines in lines), duplicates
+
+    def log(self, name = 'entries'):
+        """Returns the lines of the log with the number of duplicate entries or pairs, and the false-positive rate of a Bloom filter."""
+        lines = [f"Number of duplicate {name} removed: {self.duplicates} \n"]
+        if self.bits is not None:
+            rate = (self.setbits / self.nbits) ** self.k
+            lines.append(f"The duplicate filter is a Bloom filter of {len(self.bits)} bytes, holding {self.capacity} reads at a false-positive rate of {self.fprate}, "
+                         f"with an estimated false-positive rate of {rate:.2g} at the end \n")
+        return lines
+
+
+def make_deduplicator(args):
+    """Returns a Deduplicator for the arguments or TrimConfig, or None if duplicates are kept."""
+    if not getattr(args, 'dedup', None):
+        return None
+    memory = int(args.dedupmemory * 1e6) if args.dedupmemory is not None else None
+    return Deduplicator(args.dedup, memory, 0.001 if args.dedupfp is None else args.dedupfp)
+
+
+def process_file(reader, o, fileformat, args, progress = None, profiler = None, dedup = None, pool = None):
+    """Reads the entries from the FastqReader, processes them one at the time, in batches or in worker processes, and writes the kept entries 
+    to the output. Returns the number of kept, invalid phred, invalid, low quality and overtrimmed entries. With a Profiler, every stage is timed, 
+    and with a Deduplicator, duplicates of entries already written are removed, and are not counted as kept. The worker processes are those 
+    of the given pool, or of a pool made for this file."""
+    counts = [0] * 5
+
+    # chunks of entries are processed at once in batch mode, or in worker processes
+    if args.batchsize or (args.threads and args.threads > 1):
+        chunks = read_chunks(reader, args.batchsize or CHUNKSIZE)
+        if profiler is not None:
+            chunks = profiler.timed(chunks, 'parse', exclude = ('decompress',))
+
+        # the size of each chunk comes back with its result, so the entries and bytes in progress reports are at the same place in the file
+        size = entry_bytes if progress is not None else None
+        if args.threads and args.threads > 1:
+            results = process_parallel(chunks, args, profiler = profiler, pool = pool, size = size)
+        else:
+            results = ((process_chunk(entries, args, profiler), size(entries) if size is not None else 0) for entries in chunks)
+        if profiler is not None:
+            results = profiler.timed(results, 'process', exclude = ('decompress', 'parse', 'histograms'))
+
+        for (text, chunkcounts), nbytes in results:
+            duplicates = 0
+            if profiler is not None:
+                profiler.lap()
+            if dedup is not None:
+                (text,), duplicates = dedup.filter(text)
+                if profiler is not None:
+                    profiler.lap('dedup')
+            if profiler is not None:
+                compressing = profiler.seconds['compress']
+                o.write(text)
+                profiler.lap('write', profiler.seconds['compress'] - compressing)
+            else:
+                o.write(text)
+            counts = [a + b for a, b in zip(counts, chunkcounts)]
+            counts[KEPT] -= duplicates
+            if progress is not None:
+                progress.update(sum(chunkcounts), nbytes)
+        return tuple(counts)
+
+    # one entry at the time, with the steps of check_entry() timed by the Profiler, and duplicates removed by the Deduplicator, if given
+    for entry in (profiler.timed(reader, 'parse', exclude = ('decompress',)) if profiler is not None else reader):
+        category, trimmedentry = check_entry(entry, args, profiler)
+        if trimmedentry is not None and dedup is not None:
+            if dedup.seen(trimmedentry[1]):
+                trimmedentry = None
+            if profiler is not None:
+                profiler.lap('dedup')
+        if trimmedentry is not None:
+            if profiler is not None:
+                compressing = profiler.seconds['compress']
+                o.write_record(trimmedentry)
+                profiler.lap('write', profiler.seconds['compress'] - compressing)
+            else:
+                o.write_record(trimmedentry)
+            counts[KEPT] += 1
+        elif category != KEPT:
+            counts[category] += 1
+        if progress is not None:
+            progress.update(1, entry_bytes([entry]))
+    return tuple(counts)
+
+
+def check_entries(entries, args, profiler = None):
+    """Checks and trims a chunk of entries, in batch mode if batch size is given. Returns a list with the category of each entry, 
+    and a list with the trimmed entry for each kept entry, and None for the others. With a Profiler, the reads are added to its histograms."""
+    if args.batchsize:
+        categories, kept, starts, ends = batch_check(entries, args, profiler)
+        trimmedentries = [None] * len(entries)
+        for i, entry in zip(kept, batch_entries(entries, kept, starts, ends)):
+            trimmedentries[i] = entry
+        return categories.tolist(), trimmedentries
+    results = [check_entry(entry, args, profiler) for entry in entries]
+    return [category for category, _ in results], [trimmedentry for _, trimmedentry in results]
+
+
+def read_pairs(reader1, reader2):
+    """Reads the entries of two FastqReaders in lockstep, as pairs of entries."""
+    for entry1, entry2 in itertools.zip_longest(reader1, reader2):
+        if entry1 is None or entry2 is None:
+            raise ValueError("The paired input files have a different number of entries.")
+        yield entry1, entry2
+
+
+def pair_bytes(pairs):
+    """Returns the size of the pairs of entries in the input files."""
+    return entry_bytes(itertools.chain.from_iterable(pairs))
+
+
+def process_pair_chunk(pairs, args, profiler = None):
+    """Processes a chunk of pairs of entries. The two entries of a pair are kept or removed together, and when only one of them is kept, 
+    it is a singleton. Returns the kept pairs as text for each output file, the singletons as text, and the number of kept, invalid phred, 
+    invalid, low quality and overtrimmed entries in each input file, and the number of kept pairs, pairs where only the first or second 
+    entry is kept, and removed pairs. With a Profiler, the reads are added to its histograms."""
+    categories1, trimmed1 = check_entries([pair[0] for pair in pairs], args, profiler)
+    categories2, trimmed2 = check_entries([pair[1] for pair in pairs], args, profiler)
+
+    out1, out2, singletons = [], [], []
+    paircounts = [0, 0, 0, 0]
+    for entry1, entry2 in zip(trimmed1, trimmed2):
+        if entry1 is not None and entry2 is not None:
+            out1.extend(entry1)
+            out2.extend(entry2)
+            paircounts[0] += 1
+        elif entry1 is not None:
+            singletons.extend(entry1)
+            paircounts[1] += 1
+        elif entry2 is not None:
+            singletons.extend(entry2)
+            paircounts[2] += 1
+        else:
+            paircounts[3] += 1
+
+    counts1 = [categories1.count(category) for category in range(5)]
+    counts2 = [categories2.count(category) for category in range(5)]
+    return (''.join(line + "\n" for line in out1), ''.join(line + "\n" for line in out2), ''.join(line + "\n" for line in singletons), 
+            counts1, counts2, paircounts)
+
+
+def process_pairs(reader1, reader2, o1, o2, osingletons, args, progress = None, profiler = None, dedup = None):
+    """Reads pairs of entries from two FastqReaders, processes them in chunks, in worker processes if threads are given, and writes the 
+    kept pairs to the two outputs, and the singletons to the singleton output if given. Returns the counts of each input file, and of the pairs. 
+    With a Deduplicator, kept pairs with the same two sequences as a pair already written are removed, and are not counted as kept."""
+    counts1, counts2, paircounts = [0] * 5, [0] * 5, [0] * 4
+
+    chunks = read_chunks(read_pairs(reader1, reader2), args.batchsize or CHUNKSIZE)
+    if profiler is not None:
+        chunks = profiler.timed(chunks, 'parse', exclude = ('decompress',))
+
+    # the size of each chunk comes back with its result, like in process_file()
+    size = pair_bytes if progress is not None else None
+    if args.threads and args.threads > 1:
+        results = process_parallel(chunks, args, process_pair_chunk, profiler, size = size)
+    else:
+        results = ((process_pair_chunk(pairs, args, profiler), size(pairs) if size is not None else 0) for pairs in chunks)
+    if profiler is not None:
+        results = profiler.timed(results, 'process', exclude = ('decompress', 'parse', 'histograms'))
+
+    for (text1, text2, singletons, chunkcounts1, chunkcounts2, chunkpaircounts), nbytes in results:
+        npairs = sum(chunkpaircounts)
+        if profiler is not None:
+            profiler.lap()
+        if dedup is not None:
+            (text1, text2), duplicates = dedup.filter(text1, text2)
+            if profiler is not None:
+                profiler.lap('dedup')
+            if duplicates:
+                chunkcounts1, chunkcounts2, chunkpaircounts = list(chunkcounts1), list(chunkcounts2), list(chunkpaircounts)
+                chunkcounts1[0] -= duplicates
+                chunkcounts2[0] -= duplicates
+                chunkpaircounts[0] -= duplicates
+        if profiler is not None:
+            profiler.lap()
+            compressing = profiler.seconds['compress']
+        o1.write(text1)
+        o2.write(text2)
+        if osingletons is not None:
+            osingletons.write(singletons)
+        if profiler is not None:
+            profiler.lap('write', profiler.seconds['compress'] - compressing)
+        counts1 = [a + b for a, b in zip(counts1, chunkcounts1)]
+        counts2 = [a + b for a, b in zip(counts2, chunkcounts2)]
+        paircounts = [a + b for a, b in zip(paircounts, chunkpaircounts)]
+        if progress is not None:
+            progress.update(2 * npairs, nbytes)
+    return counts1, counts2, paircounts
+
+
+def readpairs(filename1, filename2, outfilename1, outfilename2, args):
+    """Opens the two input files of paired-end reads, and writes the kept pairs to the two output files, and the singletons to 
+    the singleton file if given. Returns a TrimStats for each input file, with the duplicate pairs as duplicates, and the counts of 
+    the pairs, or None if the files could not be processed."""
+
+    # batch mode needs NumPy
+    if args.batchsize and np is None:
+        print("NumPy is not installed, entries are processed one at the time.")
+        args.batchsize = None
+
+    # progress is only reported when asked for
+    progress = None
+    if args.progress or args.progresstime:
+        progress = Progress(args.progress, args.progresstime, args.progressfile)
+    profiler = Profiler() if args.profile else None
+    dedup = make_deduplicator(args)
+    counts = None
+
+    # compressed input files are decompressed, and output files compressed, in background threads, so the two files are handled at the same time
+    pairargs = argparse.Namespace(**vars(args))
+    pairargs.compthreads = args.compthreads or 1
+
+    try:
+        with contextlib.ExitStack() as stack:
+            f1, format1 = open_input(filename1, pairargs)
+            stack.enter_context(f1)
+            f2, format2 = open_input(filename2, pairargs)
+            stack.enter_context(f2)
+            outputs = [stack.enter_context(open_output(outfilename, pairargs)) for outfilename in (outfilename1, outfilename2, args.singletons) if outfilename]
+            if profiler is not None:
+                f1, f2 = TimedFile(f1, profiler, 'decompress'), TimedFile(f2, profiler, 'decompress')
+                outputs = [TimedFile(o, profiler, 'compress') for o in outputs]
+            writers = [FastqWriter(o) for o in outputs]
+            reader1, reader2 = FastqReader(f1), FastqReader(f2)
+            counts = process_pairs(reader1, reader2, writers[0], writers[1], writers[2] if args.singletons else None, args, progress, profiler, dedup)
+            for writer in writers:
+                writer.flush()
+
+    except FileNotFoundError:
+        print(f"Input file not found.")
+    except PermissionError:
+        print(f"Permission denied for input file.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+    # the counts are kept in memory, and the log is written once when both files are processed
+    if counts is not None:
+        truncated = reader1.truncated or reader2.truncated
+        if truncated:
+            print("The last entry of an input file is truncated.")
+        write_pair_log(*counts, (format1, format2), args.log, truncated, entry_adapters(args), dedup)
+        if profiler is not None:
+            entries = {'input1': dict(zip(COUNT_NAMES, counts[0])), 'input2': dict(zip(COUNT_NAMES, counts[1])), 'pairs': dict(zip(PAIR_COUNT_NAMES, counts[2]))}
+            profiler.write_report(args.profile, entries, (filename1, filename2), [name for name in (outfilename1, outfilename2, args.singletons) if name])
+    if progress is not None:
+        progress.close()
+    if counts is not None:
+        stats = TrimStats(), TrimStats()
+        for filestats, filecounts, reader in zip(stats, counts, (reader1, reader2)):
+            filestats.counts = list(filecounts)
+            filestats.truncated = reader.truncated
+            filestats.duplicates = dedup.duplicates if dedup is not None else 0
+        return stats[0], stats[1], list(counts[2])
+
+
+def load_checkpoint(checkpointfile, filename, outfilename):
+    """Returns the state saved in the checkpoint file, or None if there is no checkpoint file. Raises ValueError if the checkpoint is for 
+    other input or output files."""
+    try:
+        with open(checkpointfile) as cf:
+            state = json.load(cf)
+    except FileNotFoundError:
+        return None
+    if state['input'] != filename or state['output'] != outfilename:
+        raise ValueError(f"The checkpoint file is for {state['input']} and {state['output']}.")
+    return state
+
+
+def save_checkpoint(checkpointfile, state):
+    """Writes the state to the checkpoint file. It is written to a temporary file first, and then renamed, so a run that is killed while 
+    writing it leaves the last checkpoint."""
+    tmpfile = checkpointfile + '.tmp'
+    with open(tmpfile, 'w') as cf:
+        json.dump(state, cf)
+        cf.flush()
+        os.fsync(cf.fileno())
+    os.replace(tmpfile, checkpointfile)
+
+
+def process_checkpointed(reader, filename, outfilename, fileformat, args, progress = None, profiler = None):
+    """Processes the entries in segments of --checkpoint entries. Each segment is appended to the output file as a complete gzip member, 
+    or bzip2, xz or zstd stream, and then the number of entries read, the counts and the size of the output file are saved to the checkpoint 
+    file. The output file is valid up to the last checkpoint, so with --resume, it is cut back to the size of the last checkpoint, the entries 
+    that were already read are skipped, and the run goes on from there. The checkpoint file is removed when the whole file is processed. 
+    Returns the number of kept, invalid phred, invalid, low quality and overtrimmed entries."""
+    checkpointfile = args.checkpointfile or outfilename + '.checkpoint'
+    adapters = entry_adapters(args)
+    state = load_checkpoint(checkpointfile, filename, outfilename) if args.resume else None
+    entries = iter(reader)
+
+    # the entries before the checkpoint are only read, as compressed input cannot be seeked, and are not checked or trimmed again
+    if state is not None:
+        with open(outfilename, 'r+b') as o:
+            o.truncate(state['outputsize'])
+        if sum(1 for _ in itertools.islice(entries, state['entries'])) < state['entries']:
+            raise ValueError("The input file has fewer entries than the checkpoint.")
+        if adapters is not None:
+            adapters.counts = list(state['adapters'])
+        if progress is not None:
+            progress.update(state['entries'])
     else:
-        inval_entry += 1 #entry is invalid
+        state = {'input': filename, 'output': outfilename, 'entries': 0, 'counts': [0] * 5, 'outputsize': 0, 'adapters': None}
+        open(outfilename, 'wb').close()
+
+    # the worker processes are started once, and process every segment
+    with multiprocessing.Pool(args.threads) if args.threads and args.threads > 1 else contextlib.nullcontext() as pool:
+        while True:
+            first = next(entries, None)
+            if first is None:
+                break
+            segment = itertools.chain([first], itertools.islice(entries, args.checkpoint - 1))
 
-    return kept_reads, inval_phred, inval_entry, low_qual, overtrim, zipped
+            with open_output(outfilename, args, append = True) as o:
+                writer = FastqWriter(TimedFile(o, profiler, 'compress') if profiler is not None else o)
+                counts = process_file(segment, writer, fileformat, args, progress, profiler, pool = pool)
+                writer.flush()
+
+            # the output is on disk before the checkpoint that points past it
+            with open(outfilename, 'rb') as o:
+                os.fsync(o.fileno())
+            state['entries'] += sum(counts)
+            state['counts'] = [a + b for a, b in zip(state['counts'], counts)]
+            state['outputsize'] = os.path.getsize(outfilename)
+            state['adapters'] = adapters.counts if adapters is not None else None
+            save_checkpoint(checkpointfile, state)
+
+    if os.path.exists(checkpointfile):
+        os.remove(checkpointfile)
+    return tuple(state['counts'])
 
 
 def readfile(filename, outfilename, args):
-    """Opens files that are zipped or unzipped, and writes the file out zipped or unzipped accordingly."""
+    """Opens the input file in the format detected from its first bytes, and writes the output file in the format given by --outformat or its extension. 
+    Either file can be '-' for stdin or stdout. Returns a TrimStats, or None if the file could not be processed."""
+
+    # batch mode needs NumPy
+    if args.batchsize and np is None:
+        print("NumPy is not installed, entries are processed one at the time.")
+        args.batchsize = None
 
-    inval_entry = inval_phred = overtrim = low_qual = kept_reads = 0
+    # progress is only reported when asked for
+    progress = None
+    if args.progress or args.progresstime:
+        progress = Progress(args.progress, args.progresstime, args.progressfile)
+    profiler = Profiler() if args.profile else None
+    dedup = make_deduplicator(args)
+    counts = None
 
-    # for gzip files
+    # the output file is only opened when the input file is opened, and its format is known
     try:
-        with gzip.open(filename, 'rt') as f, gzip.open(outfilename, 'wt') as o:
-            zipped = True
+        f, fileformat = open_input(filename, args)
+
+        # with checkpoints, the output file is opened again for every segment
+        if args.checkpoint:
+            with f:
+                reader = FastqReader(TimedFile(f, profiler, 'decompress') if profiler is not None else f)
+                counts = process_checkpointed(reader, filename, outfilename, fileformat, args, progress, profiler)
+        else:
+            with f, open_output(outfilename, args) as o:
+                if profiler is not None:
+                    reader, writer = FastqReader(TimedFile(f, profiler, 'decompress')), FastqWriter(TimedFile(o, profiler, 'compress'))
+                else:
+                    reader, writer = FastqReader(f), FastqWriter(o)
+                counts = process_file(reader, writer, fileformat, args, progress, profiler, dedup)
+                writer.flush()
+
+    except FileNotFoundError:
+        print(f"Input file not found.")
+    except PermissionError:
+        print(f"Permission denied for input file.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+    # the counts are kept in memory, and the log is written once when the whole file is processed
+    if counts is not None:
+        if reader.truncated:
+            print("The last entry of the input file is truncated.")
+        write_log(*counts, fileformat, args.log, reader.truncated, entry_adapters(args), dedup)
+        if profiler is not None:
+            profiler.write_report(args.profile, dict(zip(COUNT_NAMES, counts)), [filename], [outfilename])
+    if progress is not None:
+        progress.close()
+    if counts is not None:
+        stats = TrimStats()
+        stats.counts = list(counts)
+        stats.truncated = reader.truncated
+        stats.duplicates = dedup.duplicates if dedup is not None else 0
+        return stats
+
+
+# A file or a pair of files processed in multi-file mode, with its output files, and a singleton file or None
+FileJob = namedtuple('FileJob', ['inputs', 'outputs', 'singletons'])
+
+# Estimated memory of one entry while it is processed, as a Record of four lines, in bytes
+ENTRY_MEMORY = 1000
+
+
+def read_manifest(manifest):
+    """Reads a manifest with one job per line: an input and an output file, or two input files, two output files and optionally 
+    a singleton file for paired-end reads, separated by tabs or spaces. Empty lines and lines starting with # are skipped. Returns a list of FileJobs."""
+    jobs = []
+    with open(manifest) as mf:
+        for number, line in enumerate(mf, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            if len(fields) == 2:
+                jobs.append(FileJob(fields[:1], fields[1:], None))
+            elif len(fields) in (4, 5):
+                jobs.append(FileJob(fields[:2], fields[2:4], fields[4] if len(fields) == 5 else None))
+            else:
+                raise ValueError(f"Line {number} of the manifest should have 2, 4 or 5 files.")
+    check_jobs(jobs)
+    return jobs
+
+
+def glob_jobs(patterns, outdir):
+    """Returns a FileJob for every file matched by the glob patterns, with an output file of the same name in the output directory. 
+    Raises ValueError if two matched files have the same name."""
+    jobs = []
+    for filename in sorted(set(itertools.chain.from_iterable(glob.glob(pattern) for pattern in patterns))):
+        outfilename = os.path.join(outdir, os.path.basename(filename))
+        jobs.append(FileJob([filename], [outfilename], None))
+    check_jobs(jobs)
+    return jobs
+
+
+def check_jobs(jobs):
+    """Raises ValueError if two jobs would write the same file, such as input files of the same name from two directories, since they run 
+    at the same time, or if a job would write over an input file."""
+    written = {}
+    for job in jobs:
+        for filename in job.outputs + [job.singletons, job.outputs[0] + '.log']:
+            if filename is None:
+                continue
+            path = os.path.abspath(filename)
+            if path in written:
+                raise ValueError(f"{filename} would be written by the jobs of {', '.join(written[path].inputs)} and {', '.join(job.inputs)}.")
+            written[path] = job
+    for job in jobs:
+        for filename in job.inputs:
+            if os.path.abspath(filename) in written:
+                raise ValueError(f"The input file {filename} would be written by the job of {', '.join(written[os.path.abspath(filename)].inputs)}.")
+
+
+def job_size(job):
+    """Returns the size of the input files of a job. Missing files have size 0, and are reported when the job runs."""
+    return sum(os.path.getsize(filename) for filename in job.inputs if os.path.isfile(filename))
+
+
+def job_files(job):
+    """Returns the number of files a job has open at once."""
+    return len(job.inputs) + len(job.outputs) + (job.singletons is not None)
+
+
+def job_memory(job, args):
+    """Returns an estimate of the memory used by a job: the blocks read and queued for every input file, a chunk of entries, the 
+    blocks buffered and compressed for every output file, and the memory cap of deduplication."""
+    threads = args.compthreads or (1 if len(job.inputs) == 2 else 0)
+
+    # with threads, blocks are queued by ThreadedReader, and compressed by ParallelGzipWriter; single files are checked one entry at the time, 
+    # unless in batch mode, and pairs in chunks
+    chunk = args.batchsize or (CHUNKSIZE if len(job.inputs) == 2 else 1)
+    inputs = len(job.inputs) * (BLOCKSIZE * (5 if threads else 1) + chunk * ENTRY_MEMORY)
+    outputs = (len(job.outputs) + (job.singletons is not None)) * BLOCKSIZE * (2 * threads + 2)
+
+    # the Bloom filter is allocated at once, and the set of exact deduplication can grow up to the cap, or without limit if there is none, 
+    # which is only allowed without --maxmemory
+    dedup = args.dedupmemory * 1e6 if args.dedup and args.dedupmemory is not None else 0
+    return inputs + outputs + dedup
+
 
-            while True:
-                entry = [f.readline().strip() for _ in range(4)]  # Read four lines at a time
-                if entry[0] == '':  # If the first line is empty, it means we've reached the end of the file and stop
+def process_job(job, args):
+    """Processes one FileJob in a worker process of the pool, with its own log file, and profile report if asked for, next to its first output 
+    file. Returns the job and its stats, as returned by readfile() or readpairs()."""
+    fileargs = argparse.Namespace(**vars(args))
+    fileargs.log = job.outputs[0] + '.log'
+    fileargs.profile = job.outputs[0] + ('.profile.tsv' if args.profile.endswith('.tsv') else '.profile.json') if args.profile else None
+    fileargs.singletons = job.singletons
+    fileargs.checkpointfile = None
+
+    # the files are processed one at the time in each worker process, which cannot start worker processes of its own
+    fileargs.threads = None
+    fileargs.progress = fileargs.progresstime = None
+    if len(job.inputs) == 2:
+        fileargs.checkpoint = None
+        return job, readpairs(*job.inputs, *job.outputs, fileargs)
+    return job, readfile(job.inputs[0], job.outputs[0], fileargs)
+
+
+def process_jobs(jobs, args):
+    """Processes FileJobs in one pool of --threads worker processes, the largest first, so the small ones fill the gaps at the end. 
+    A job is only started when its files and estimated memory fit in --maxopen and --maxmemory, with those of the running jobs, 
+    but there is always at least one job running. Yields the jobs and their stats as they finish."""
+    workers = args.threads or 1
+    maxopen = args.maxopen or float('inf')
+    maxmemory = args.maxmemory * 1e6 if args.maxmemory else float('inf')
+    pending = deque(sorted(jobs, key = job_size, reverse = True))
+    done = queue.Queue()
+    running = openfiles = memory = 0
+
+    with multiprocessing.Pool(workers) as pool:
+        while pending or running:
+            while pending and running < workers:
+                job = pending[0]
+                if running and (openfiles + job_files(job) > maxopen or memory + job_memory(job, args) > maxmemory):
                     break
-                kept_reads, inval_phred, inval_entry, low_qual, overtrim, zipped = main_process(entry, kept_reads, inval_phred, inval_entry, low_qual, overtrim, zipped, o)
-                write_log(kept_reads, inval_phred, inval_entry, low_qual, overtrim, zipped, args.log)
-
-    except OSError:
-        zipped = False
-
-    # for fastq files
-    if zipped == False:
-        try: 
-            with open(filename, 'r') as f, open(outfilename, 'w') as o:
-                while True:
-                    entry = [f.readline().strip() for _ in range(4)]  # Read four lines at a time
-                    if entry[0] == '':  # If the first line is empty, it means we've reached the end of the file and stop
-                        break
-                    kept_reads, inval_phred, inval_entry, low_qual, overtrim, zipped = main_process(entry, kept_reads, inval_phred, inval_entry, low_qual, overtrim, zipped, o)
-                    write_log(kept_reads, inval_phred, inval_entry, low_qual, overtrim, zipped, args.log)
-
-        except FileNotFoundError:
-            print(f"Input file not found.")
-        except PermissionError:
-            print(f"Permission denied for input file.")
-        except Exception as e:
-            print(f"An error occurred: {e}")
+                pending.popleft()
+                running += 1
+                openfiles += job_files(job)
+                memory += job_memory(job, args)
+                pool.apply_async(process_job, (job, args), callback = done.put, error_callback = lambda e, job = job: done.put((job, None)))
+
+            job, stats = done.get()
+            running -= 1
+            openfiles -= job_files(job)
+            memory -= job_memory(job, args)
+            yield job, stats
+
+
+def write_summary(results, logfile):
+    """A summary log is written in multi-file mode, containing the number of entries kept and discarded in all files, and one line for each job"""
+    single = [stats for job, stats in results if isinstance(stats, TrimStats)]
+    paired = [stats for job, stats in results if isinstance(stats, tuple)]
+    filestats = single + [stats for pair in paired for stats in pair[:2]]
+    counts = [sum(stats.counts[category] for stats in filestats) for category in range(5)]
+    duplicates = sum(stats.duplicates for stats in filestats)
+    try:
+        with open(logfile, 'w') as lf:
+            lf.write(f"Number of jobs: {len(results)} \n")
+            lf.write(f"Number of jobs that could not be processed: {len(results) - len(single) - len(paired)} \n")
+            lf.write(f"Total number of entries: {sum(counts) + duplicates} \n")
+            lf.write(f"Number of trimmed entries: {counts[KEPT]} \n")
+            lf.write(f"Number of entries with invalid phred quality: {counts[INVAL_PHRED]} \n")
+            lf.write(f"Number of invalid entries: {counts[INVAL_ENTRY]} \n")
+            lf.write(f"Number of entries removed because of low quality after trimming (low mean quality, short length, N content): {counts[LOW_QUAL]} \n")
+            lf.write(f"Number of entries removed because of invalid trimming parameters: {counts[OVERTRIM]} \n")
+            lf.write(f"Number of duplicate entries removed: {duplicates} \n")
+            if paired:
+                lf.write(f"Total number of pairs: {sum(sum(pair[2]) + pair[0].duplicates for pair in paired)} \n")
+                lf.write(f"Number of kept pairs: {sum(pair[2][0] for pair in paired)} \n")
+
+            # one line for each job, in the order they finished
+            lf.write("Input\tOutput\tEntries\tKept\tInvalid phred\tInvalid\tLow quality\tOvertrimmed\tDuplicates \n")
+            for job, stats in results:
+                inputs, outputs = ','.join(job.inputs), ','.join(job.outputs)
+                if stats is None:
+                    lf.write(f"{inputs}\t{outputs}\tfailed \n")
+                    continue
+                jobstats = stats[:2] if isinstance(stats, tuple) else [stats]
+                jobcounts = [sum(s.counts[category] for s in jobstats) for category in range(5)]
+                jobduplicates = sum(s.duplicates for s in jobstats)
+                lf.write('\t'.join(map(str, [inputs, outputs, sum(jobcounts) + jobduplicates, *jobcounts, jobduplicates])) + " \n")
+
+    except FileNotFoundError:
+        print(f"Input file not found.")
+    except PermissionError:
+        print(f"Permission denied for input file.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+
+def readbatch(jobs, args):
+    """Processes many files, or pairs of files, in multi-file mode. Every job gets a log file next to its first output file, and the summary 
+    of all jobs is written to the log file."""
+    results = []
+    for job, stats in process_jobs(jobs, args):
+        results.append((job, stats))
+        print(f"{'Finished' if stats is not None else 'Failed'} {', '.join(job.inputs)} ({len(results)}/{len(jobs)})")
+    write_summary(results, args.log)
+
+
+class TrimConfig:
+    """Options for checking and trimming entries, with the same names as the command-line arguments, so a TrimConfig can be used wherever 
+    the parsed arguments are. Only the trimming type is mandatory."""
+
+    def __init__(self, trimtype, phred = None, thres3 = None, thres5 = None, movwin = None, minlen = None, minqual = None, maxN = None, 
+                 batchsize = None, outformat = None, complevel = None, compthreads = None, external = False, alphabet = None, ignorecase = False, 
+                 validate = True, adapters = (), mismatches = 1, minoverlap = 3, polyg = None, polya = None, dedup = None, dedupmemory = None, 
+                 dedupfp = None):
+        if trimtype not in ("N", "Q"):
+            raise ValueError("Trimtype should be N or Q.")
+        self.trimtype = trimtype
+        self.phred = phred
+        self.thres3 = thres3
+        self.thres5 = thres5
+        self.movwin = movwin
+        self.minlen = minlen
+        self.minqual = minqual
+        self.maxN = maxN
+        self.batchsize = batchsize if np is not None else None
+        self.outformat = outformat
+        self.complevel = complevel
+        self.compthreads = compthreads
+        self.external = external
+        self.bases = alphabet_bases(alphabet, ignorecase, validate)
+
+        # the k-mer index of the adapters is built once, and its counts are kept for all the entries trimmed with this TrimConfig
+        self.adapters = None
+        if adapters or polyg is not None or polya is not None:
+            self.adapters = AdapterTrimmer(adapters, mismatches, minoverlap, polyg, polya)
+        self.dedup = dedup
+        self.dedupmemory = dedupmemory
+        self.dedupfp = dedupfp
+
+
+class TrimStats:
+    """Number of kept, invalid phred, invalid, low quality and overtrimmed entries, and of duplicates removed."""
+    __slots__ = ('counts', 'truncated', 'duplicates')
 
+    def __init__(self):
+        self.counts = [0, 0, 0, 0, 0]
+        self.truncated = False
+        self.duplicates = 0
+
+    @property
+    def kept(self):
+        return self.counts[KEPT]
+
+    @property
+    def inval_phred(self):
+        return self.counts[INVAL_PHRED]
+
+    @property
+    def inval_entry(self):
+        return self.counts[INVAL_ENTRY]
+
+    @property
+    def low_qual(self):
+        return self.counts[LOW_QUAL]
+
+    @property
+    def overtrim(self):
+        return self.counts[OVERTRIM]
+
+    @property
+    def total(self):
+        return sum(self.counts) + self.duplicates
+
+    def __repr__(self):
+        return f"TrimStats(kept={self.kept}, inval_phred={self.inval_phred}, inval_entry={self.inval_entry}, low_qual={self.low_qual}, overtrim={self.overtrim}, duplicates={self.duplicates})"
+
+
+class Trimmer:
+    """Checks and trims entries with a TrimConfig, for use of XTrim as a library. Nothing is printed, and no global state is used."""
+
+    def __init__(self, config):
+        self.config = config
+
+    def process(self, records):
+        """Checks and trims an iterable of Records, or lists of four lines. Returns a generator of the trimmed entries that are kept, and 
+        a TrimStats, which is updated while the generator is consumed. Duplicates are removed within each call, if the TrimConfig asks for it."""
+        stats = TrimStats()
+        kept = self._process(records, stats)
+        dedup = make_deduplicator(self.config)
+        if dedup is not None:
+            kept = self._deduplicate(kept, stats, dedup)
+        return kept, stats
+
+    def _deduplicate(self, kept, stats, dedup):
+        for record in kept:
+            if dedup.seen(record[1]):
+                stats.counts[KEPT] -= 1
+                stats.duplicates += 1
+            else:
+                yield record
+
+    def _process(self, records, stats):
+        counts = stats.counts
+
+        # in batch mode, chunks of entries are checked at once
+        if self.config.batchsize:
+            for entries in read_chunks(records, self.config.batchsize):
+                categories, *kept = batch_check(entries, self.config)
+                for category, count in enumerate(np.bincount(categories, minlength = 5).tolist()):
+                    counts[category] += count
+                yield from batch_entries(entries, *kept)
+            return
+
+        for record in records:
+            category, trimmedentry = check_entry(record, self.config)
+            counts[category] += 1
+            if trimmedentry is not None:
+                yield trimmedentry
+
+    def trim_file(self, filename, outfilename):
+        """Trims an input file into an output file, in the formats detected and given like on the command line. Returns a TrimStats."""
+        f, fileformat = open_input(filename, self.config)
+        with f, open_output(outfilename, self.config) as o:
+            reader, writer = FastqReader(f), FastqWriter(o)
+            kept, stats = self.process(reader)
+            for record in kept:
+                writer.write_record(record)
+            writer.flush()
+        stats.truncated = reader.truncated
+        return stats
 
 
 def main(infile, outfile, logfile, phred, trimtype, thres_3, thres_5, movwin, minlen, minqual, max_N):
@@ -303,18 +2066,22 @@ xtrim_art = """  ░▒▓█▓▒░░▒▓█▓▒░▒▓█████
                                                                      
 
 
-print(xtrim_art)
-print("              #########################################")
-print("              #               XTrim v1.0              #")
-print("              #########################################")
-print(" ")
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="XTrim: Readtrimmer for fastq files!")
 
     # Add command-line arguments
-    parser.add_argument("-i", "--input", type=str, required=True, help="Input file (Mandatory)")
-    parser.add_argument("-o", "--output", type=str, required=True, help="Output file (Mandatory)")
+    parser.add_argument("-i", "--input", type=str, required=False, help="Input file, or - for stdin (Mandatory, unless paired-end input files are given)")
+    parser.add_argument("-o", "--output", type=str, required=False, help="Output file, or - for stdout (Mandatory, unless paired-end output files are given)")
+    parser.add_argument("-i1", "--input1", type=str, required=False, help="First input file of paired-end reads (Optional)")
+    parser.add_argument("-i2", "--input2", type=str, required=False, help="Second input file of paired-end reads (Optional)")
+    parser.add_argument("-o1", "--output1", type=str, required=False, help="First output file of paired-end reads (Optional)")
+    parser.add_argument("-o2", "--output2", type=str, required=False, help="Second output file of paired-end reads (Optional)")
+    parser.add_argument("-mf", "--manifest", type=str, required=False, help="Manifest of files to process in multi-file mode, one job per line (Optional)")
+    parser.add_argument("-ig", "--inputs", type=str, nargs='+', required=False, help="Glob patterns of input files to process in multi-file mode (Optional)")
+    parser.add_argument("-od", "--outdir", type=str, required=False, help="Output directory of the files given by --inputs (Optional)")
+    parser.add_argument("-fo", "--maxopen", type=int, required=False, help="Maximum number of files open at once in multi-file mode (Optional)")
+    parser.add_argument("-mm", "--maxmemory", type=float, required=False, help="Maximum estimated memory of the files processed at once in multi-file mode, in MB (Optional)")
+    parser.add_argument("-s", "--singletons", type=str, required=False, help="Output file for paired-end entries whose mate is removed (Optional)")
     parser.add_argument("-lg", "--log", type=str, required=True, help="Log file (Mandatory)")
     parser.add_argument("-p", "--phred", type=int, required=False, help="Phred encoding (Optional)")
     parser.add_argument("-tt", "--trimtype", type=str, required=True, help="Trimming based on no. of bases(N), or quality(Q) (Mandatory)")
@@ -324,10 +2091,89 @@ if __name__ == "__main__":
     parser.add_argument("-l", "--minlen", type=int, required=False, help="Minimum length of read after trimming")
     parser.add_argument("-q", "--minqual", type=float, required=False, help="Minimum mean quality of read after trimming (Optional)")
     parser.add_argument("-N", "--maxN", type=int, required=False, help="Maximum number of unknow bases in read after trimming (Optional)")
+    parser.add_argument("-T", "--threads", type=int, required=False, help="Number of worker processes (Optional)")
+    parser.add_argument("-b", "--batchsize", type=int, required=False, help="Number of entries processed at once with NumPy in batch mode (Optional)")
+    parser.add_argument("-of", "--outformat", type=str, required=False, choices=["fastq", "gzip", "bgzf", "bzip2", "xz", "zstd"], help="Format of the output file, instead of the format given by its extension (Optional)")
+    parser.add_argument("-cl", "--complevel", type=int, required=False, help="Compression level of the output, default 9 for gzip (Optional)")
+    parser.add_argument("-ct", "--compthreads", type=int, required=False, help="Number of threads for compression and decompression (Optional)")
+    parser.add_argument("-x", "--external", action="store_true", help="Use pigz or igzip for gzip files, if found on PATH (Optional)")
+    parser.add_argument("-pr", "--progress", type=int, required=False, help="Report progress every given number of entries (Optional)")
+    parser.add_argument("-pt", "--progresstime", type=float, required=False, help="Report progress every given number of seconds (Optional)")
+    parser.add_argument("-pf", "--progressfile", type=str, required=False, help="File for progress reports, instead of stderr (Optional)")
+    parser.add_argument("-a", "--alphabet", type=str, required=False, choices=list(ALPHABETS), help="Bases allowed in the sequences, default standard (ACGTNX) (Optional)")
+    parser.add_argument("-ic", "--ignorecase", action="store_true", help="Allow lowercase bases in the sequences (Optional)")
+    parser.add_argument("-nv", "--novalidate", action="store_true", help="Do not check the format of the entries, for trusted input (Optional)")
+    parser.add_argument("-ad", "--adapter", type=str, action="append", help="Adapter sequence, or illumina, nextera or smallrna, trimmed with everything after it from the 3' end; can be given more than once (Optional)")
+    parser.add_argument("-am", "--mismatches", type=int, default=1, help="Maximum number of mismatches in an adapter or tail, one for every 6 bases after the first 6 (Optional)")
+    parser.add_argument("-mo", "--minoverlap", type=int, default=3, help="Minimum length of an adapter at the very end of a read (Optional)")
+    parser.add_argument("-pg", "--polyg", type=int, required=False, help="Trim poly-G tails of at least this length (Optional)")
+    parser.add_argument("-pa", "--polya", type=int, required=False, help="Trim poly-A tails of at least this length (Optional)")
+    parser.add_argument("-d", "--dedup", type=str, required=False, choices=["exact", "bloom"], help="Remove duplicates of kept reads or pairs, with a set of hashes or a Bloom filter (Optional)")
+    parser.add_argument("-dm", "--dedupmemory", type=float, required=False, help="Memory cap of deduplication in MB, needed for a Bloom filter (Optional)")
+    parser.add_argument("-df", "--dedupfp", type=float, required=False, help="False-positive rate of the Bloom filter, default 0.001 (Optional)")
+    parser.add_argument("-ck", "--checkpoint", type=int, required=False, help="Save a checkpoint every given number of entries, so the run can be resumed (Optional)")
+    parser.add_argument("-cf", "--checkpointfile", type=str, required=False, help="Checkpoint file, default the output file with .checkpoint added (Optional)")
+    parser.add_argument("-r", "--resume", action="store_true", help="Go on from the last checkpoint of a run that was stopped (Optional)")
+    parser.add_argument("-pp", "--profile", type=str, required=False, help="Write the time of each stage, memory use and read histograms to this JSON or .tsv file (Optional)")
 
     # Parse the command-line arguments
     args = parser.parse_args()
+    args.bases = alphabet_bases(args.alphabet, args.ignorecase, not args.novalidate)
+    args.adapters = None
+    if args.adapter or args.polyg is not None or args.polya is not None:
+        args.adapters = AdapterTrimmer(args.adapter or (), args.mismatches, args.minoverlap, args.polyg, args.polya)
+
+    # either one input and output file, two of each for paired-end reads, or a manifest or glob patterns of many files
+    paired = any([args.input1, args.input2, args.output1, args.output2])
+    multifile = bool(args.manifest or args.inputs)
+    if multifile and (paired or args.input or args.output or args.singletons):
+        parser.error("multi-file mode takes the files from --manifest or --inputs, not from the other input and output arguments")
+    if args.inputs and not args.outdir:
+        parser.error("--inputs needs --outdir")
+    if multifile and args.maxmemory and args.dedup and args.dedupmemory is None:
+        parser.error("--maxmemory needs --dedupmemory with --dedup, as the memory of deduplication has no limit without it")
+    if paired and not all([args.input1, args.input2, args.output1, args.output2]):
+        parser.error("paired-end mode needs --input1, --input2, --output1 and --output2")
+    if not paired and not multifile and not (args.input and args.output):
+        parser.error("the following arguments are required: -i/--input, -o/--output")
+
+    # the Bloom filter is allocated at once, so its size is given, and is not left to a default that could be much larger than needed
+    if args.dedup == 'bloom' and args.dedupmemory is None:
+        parser.error("--dedup bloom needs --dedupmemory")
+    if args.dedupmemory is not None and args.dedupmemory * 1e6 < 2:
+        parser.error("--dedupmemory should be a positive number of MB")
+    if args.dedupfp is not None and not 0 < args.dedupfp < 1:
+        parser.error("--dedupfp should be between 0 and 1")
+
+    # checkpoints need a named output file that can be cut back, and the set or filter of deduplication is not saved in them
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+    if args.checkpoint and (paired or args.output == '-' or args.dedup):
+        parser.error("--checkpoint needs a single output file, not stdout, and cannot be used with paired-end reads or --dedup")
+
+    # when an output is written to stdout, everything else is printed to stderr
+    if '-' in (args.output, args.output1, args.output2, args.singletons):
+        sys.stdout = sys.stderr
+
+    print(xtrim_art)
+    print("              #########################################")
+    print("              #               XTrim v1.0              #")
+    print("              #########################################")
+    print(" ")
 
     # Call the main function with the provided inputs
-    main(args.input, args.output, args.log, args.phred, args.trimtype, args.thres3, args.thres5, args.movwin, args.minlen, args.minqual, args.maxN)
-    readfile(args.input, args.output, args)
\ No newline at end of file
+    if multifile:
+        try:
+            jobs = read_manifest(args.manifest) if args.manifest else glob_jobs(args.inputs, args.outdir)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if args.outdir:
+            os.makedirs(args.outdir, exist_ok = True)
+        main(f"{len(jobs)} jobs from {args.manifest or ' '.join(args.inputs)}", args.outdir or "given in the manifest", args.log, args.phred, args.trimtype, args.thres3, args.thres5, args.movwin, args.minlen, args.minqual, args.maxN)
+        readbatch(jobs, args)
+    elif paired:
+        main(f"{args.input1}, {args.input2}", f"{args.output1}, {args.output2}", args.log, args.phred, args.trimtype, args.thres3, args.thres5, args.movwin, args.minlen, args.minqual, args.maxN)
+        readpairs(args.input1, args.input2, args.output1, args.output2, args)
+    else:
+        main(args.input, args.output, args.log, args.phred, args.trimtype, args.thres3, args.thres5, args.movwin, args.minlen, args.minqual, args.maxN)
+        readfile(args.input, args.output, args)
\ No newline at end of file
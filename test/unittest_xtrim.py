@@ -2,6 +2,11 @@
 
 import pytest
 import sys
+import os
+import io
+import subprocess
+import gzip
+from argparse import Namespace
 
 sys.path.append('src')
 
@@ -25,6 +30,17 @@ def test_controlentry4():
 def test_controlentry5():
     assert control_entry(['@Header1', 'ACCTGAACGNAAXT', '+', '!"#$%&()-.']) == False, "Check that the function returns false in case the sequence has a different length than the quality line in the entry"
 
+def test_controlentry6():
+    assert control_entry(['@Header1', 'acctgRAYN', '+', '!"#$%&()*'], alphabet_bases('iupac', ignorecase = True)) == True and control_entry(['@Header1', 'ACCTGAACGNAAXT', '+', '!"#$%&()*+,-./'], alphabet_bases('strict')) == False, "Check that the alphabet of the sequence can be chosen"
+
+def test_controlentry7():
+    args = Namespace(phred = 33, trimtype = "N", thres3 = None, thres5 = None, movwin = None, minlen = None, minqual = None, maxN = None, bases = alphabet_bases(validate = False))
+    assert check_entry(['Header1', 'ACCT', '+', '!!!!'], args) == (KEPT, ['Header1', 'ACCT', '+', '!!!!']), "Check that entries are not validated when validation is skipped"
+
+def test_controlentry8():
+    args = Namespace(phred = 33, trimtype = "Q", thres3 = None, thres5 = None, movwin = None, minlen = None, minqual = 20, maxN = None, bases = alphabet_bases(validate = False))
+    assert check_entry(['@Header1', 'ACCT', '', ''], args) == (INVAL_ENTRY, None) and check_entry(['@Header1', 'ACCT', '+', 'IIII!'], args) == (INVAL_ENTRY, None), "Check that the lengths are checked when validation is skipped"
+
 def test_convertphred1():
     assert convert_phred('!"#$%&()*+,-./', 33) == [0,1,2,3,4,5,7,8,9,10,11,12,13,14], "Check that function correctly converts phred33 encoding correctly"
 
@@ -40,6 +56,12 @@ def test_convertphred4():
 def test_convertphred5():
     assert convert_phred('@ABCDEFGHIJKLMN', 64) == [0,1,2,3,4,5,6,7,8,9,10,11,12,13,14], "Check that function converts phred64 encoding correctly"
 
+def test_convertphred6():
+    assert convert_phred('@ABCDEFGHIJKLMNh') == [0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,40], "Check that function detects and converts phred64 encoding correctly"
+
+def test_detectphred1():
+    assert (detect_phred('!"#$%&'), detect_phred('@ABh'), detect_phred('!h'), detect_phred('')) == (33, 64, None, None), "Check that phred encoding is detected, and None is returned for invalid quality strings"
+
 def test_trim1():
     assert trim(['@Header1', 'ACCTGAACGNAAXT', '+', '!"#$%&()*+,-./'], [0,1,2,3,4,5,7,8,9,10,11,12,13,14], "N", thres3 = 2, thres5 = 3) == ['@Header1', 'TGAACGNAA', '+', '$%&()*+,-'] , "Check that function trims correctly when trimming with a specified number of reads"
 
@@ -72,6 +94,18 @@ def test_trim10():
     with pytest.raises(ValueError):
        trim(['@Header1', 'ACCTGAACGNAAXT', '+', '!"#$%&()*+,-./'], [0,1,2,3,4,5,7,8,9,10,11,12,13,14], 90, thres5 = 20) 
 
+def test_trimbounds1():
+    assert trim_bounds(14, None, "N", thres3 = 2, thres5 = 3) == (3, 12), "Check that the kept part of the read is found when trimming with a specified number of bases"
+
+def test_trimbounds2():
+    assert trim_bounds(16, [0,1,2,3,4,5,7,8,9,10,11,12,13,14,0,2], "Q", thres3 = 2, thres5 = 3, mw = 2) == (3, 15), "Check that the kept part of the read is found when trimming by quality"
+
+def test_cutpoints1():
+    assert quality_cut_points([0,1,2,3,4,5,7,8,9,10,11,12,13,14,0,2], 2, thres5 = 3, thres3 = 2) == (3, 15), "Check that the cut points match the trimmed read from 5' and 3' end with moving window"
+
+def test_cutpoints2():
+    assert quality_cut_points([0,1,2,3,4,5,7,8,9,10,11,12,13,14], 3) == (0, 14), "Check that nothing is cut when no quality thresholds are given"
+
 def test_postproc1():
     assert postprocess(['@Header1', 'ACCTGAACGNAAXTGG', '+', '!"#$%&()*+,-./!#'], [0,1,2,3,4,5,7,8,9,10,11,12,13,14,0,2], length = 10, qual = 3, N=3) == True, "Check that the function returns True when the read satisfies all specified requirements"
     
@@ -84,6 +118,223 @@ def test_postproc3():
 def test_postproc4():
     assert postprocess(['@Header1', 'ACCTNNNNGNAAXTGG', '+', '!"#$%&()*+,-./!#'], [0,1,2,3,4,5,7,8,9,10,11,12,13,14,0,2], length = 10, qual = 3, N=2) == False, "Check that the function discards reads with to many N in the sequence"
 
+def test_batchprocess1():
+    pytest.importorskip("numpy")
+    args = Namespace(phred = None, trimtype = "Q", thres3 = 2, thres5 = 3, movwin = 2, minlen = 10, minqual = 3, maxN = 3)
+    entries = [['@Header1', 'ACCTGAACGNAAXTGG', '+', '!"#$%&()*+,-./!#'], ['Header2', 'ACCTGAACGNAAXTGG', '+', '!"#$%&()*+,-./!#'], ['@Header3', 'ACCTGAACGNAAXTGG', '+', '!"#$%&()*+,-./!~']]
+    assert batch_process(entries, args) == ([['@Header1', 'TGAACGNAAXTG', '+', '$%&()*+,-./!']], (1, 1, 1, 0, 0)), "Check that batch mode trims and counts a chunk of entries like main_process"
+
+def test_batchprocess2():
+    pytest.importorskip("numpy")
+    args = Namespace(phred = 33, trimtype = "N", thres3 = 2, thres5 = 3, movwin = None, minlen = 10, minqual = None, maxN = None)
+    entries = [['@Header1', 'ACCTGAACGNAAXT', '+', '!"#$%&()*+,-./'], ['@Header2', 'ACCTG', '+', '!"#$%'], ['@Header3', 'ACCTGAACGNAAXT', '+', '!"#$%&()*+,-./'[::-1]]]
+    assert batch_process(entries, args) == ([], (0, 0, 0, 2, 1)), "Check that batch mode counts overtrimmed and short entries"
+
+def test_checkentry1():
+    args = Namespace(phred = None, trimtype = "Q", thres3 = 2, thres5 = 3, movwin = 2, minlen = 10, minqual = 3, maxN = 3)
+    assert check_entry(['@Header1', 'ACCTGAACGNAAXTGG', '+', '!"#$%&()*+,-./!#'], args) == (KEPT, ['@Header1', 'TGAACGNAAXTG', '+', '$%&()*+,-./!']), "Check that a kept entry is returned trimmed"
+
+def test_checkentry2():
+    args = Namespace(phred = None, trimtype = "Q", thres3 = 2, thres5 = 3, movwin = 2, minlen = 20, minqual = 3, maxN = 3)
+    assert check_entry(['@Header1', 'ACCTGAACGNAAXTGG', '+', '!"#$%&()*+,-./!#'], args) == (LOW_QUAL, None), "Check that the category of a removed entry is returned"
+
+def test_checkentry3():
+    args = Namespace(phred = 33, trimtype = "N", thres3 = 1, thres5 = None, movwin = None, minlen = None, minqual = None, maxN = None, adapters = AdapterTrimmer(['AGATCGGAAGAGC']))
+    assert check_entry(['@Header1', 'ACCTGAGATCGGAAG', '+', '!!!!!!!!!!!!!!!'], args) == (KEPT, ['@Header1', 'ACCT', '+', '!!!!']) and check_entry(['@Header1', 'AGATCGGAAG', '+', '!!!!!!!!!!'], args) == (LOW_QUAL, None), "Check that adapters are cut off before trimming, and reads that are all adapter are removed"
+
+def test_checkentry4():
+    entry = ['@Header1', 'acgtnnnnagatcggaagagcgggggggg', '+', 'I' * 29]
+    assert check_entry(entry, TrimConfig("N", maxN = 4, ignorecase = True, adapters = ['illumina'], polyg = 5)) == (KEPT, ['@Header1', 'acgtnnnn', '+', 'IIIIIIII']) \
+        and check_entry(entry, TrimConfig("N", maxN = 3, ignorecase = True)) == (LOW_QUAL, None), "Check that lowercase bases are counted as N and matched with adapters"
+
+def test_adaptertrimmer1():
+    adapters = AdapterTrimmer(['illumina'])
+    assert adapters.cut('ACCTGAACGTAGATCGGTAGAGCACAC') == 10 and adapters.cut('ACCTGAACGTAGAT') == 10 and adapters.cut('ACCTGAACGTAG') == 12 and adapters.counts == [2, 0, 0, 21], "Check that adapters with a mismatch and partial adapters at the end are cut off"
+
+def test_adaptertrimmer2():
+    adapters = AdapterTrimmer(polyg = 10, polya = 5)
+    assert adapters.cut('ACCTGAACGTAAAAAAGGGGGTGGGGGG') == 10 and adapters.cut('ACCTGGGGGG') == 10 and adapters.counts == [0, 1, 1, 18], "Check that poly-G and poly-A tails are cut off"
+
+def test_adaptertrimmer3():
+    adapters = AdapterTrimmer(['AGATC'])
+    assert adapters.cut('CCCCCCCCCCAGATCTTTTTTTTTTTT') == 10 and adapters.cut('CCCCCCCCCCAGTTCTTTTTTTTTTTT') == 27, "Check that adapters shorter than a k-mer are found exactly in the middle of a read"
+
+def test_processpairchunk1():
+    args = Namespace(phred = 33, trimtype = "N", thres3 = 1, thres5 = None, movwin = None, minlen = 3, minqual = None, maxN = None, batchsize = None)
+    pairs = [(['@Header1', 'ACCT', '+', '!!!!'], ['@Header1', 'ACCT', '+', '!!!!']), (['@Header2', 'ACCT', '+', '!!!!'], ['@Header2', 'ACC', '+', '!!!']), (['Header3', 'ACCT', '+', '!!!!'], ['@Header3', 'ACC', '+', '!!!'])]
+    assert process_pair_chunk(pairs, args) == ('@Header1\nACC\n+\n!!!\n', '@Header1\nACC\n+\n!!!\n', '@Header2\nACC\n+\n!!!\n', [2, 0, 1, 0, 0], [1, 0, 0, 2, 0], [1, 1, 0, 1]), "Check that pairs are kept or removed together, and that singletons are returned"
+
+def test_readpairs1():
+    reader1 = FastqReader(io.BytesIO(b"@Header1\nACCT\n+\n!!!!\n@Header2\nACCT\n+\n!!!!\n"))
+    reader2 = FastqReader(io.BytesIO(b"@Header1\nACCT\n+\n!!!!\n"))
+    with pytest.raises(ValueError):
+        list(read_pairs(reader1, reader2))
+
+def test_trimmer1():
+    trimmer = Trimmer(TrimConfig("Q", thres3 = 2, thres5 = 3, movwin = 2, minlen = 10))
+    kept, stats = trimmer.process([Record('@Header1', 'ACCTGAACGNAAXTGG', '+', '!"#$%&()*+,-./!#'), Record('Header2', 'ACCT', '+', '!!!!'), Record('@Header3', 'ACCTGAACGN', '+', '!"#$%&()*+')])
+    assert list(kept) == [Record('@Header1', 'TGAACGNAAXTG', '+', '$%&()*+,-./!')] and stats.counts == [1, 0, 1, 1, 0], "Check that the Trimmer returns the kept records and the stats"
+
+def test_trimmer2():
+    with pytest.raises(ValueError):
+        TrimConfig("X")
+
+def test_trimmer3(tmp_path):
+    (tmp_path / "in.fq").write_bytes(b"@Header1\nACCTGAACGNAAXTGG\n+\n!\"#$%&()*+,-./!#\n@Header2\nACCT\n+\n!!!!\n")
+    stats = Trimmer(TrimConfig("N", thres3 = 1)).trim_file(str(tmp_path / "in.fq"), str(tmp_path / "out.fq.gz"))
+    assert gzip.decompress((tmp_path / "out.fq.gz").read_bytes()) == b"@Header1\nACCTGAACGNAAXTG\n+\n!\"#$%&()*+,-./!\n@Header2\nACC\n+\n!!!\n" and stats.kept == 2, "Check that the Trimmer trims a file into a gzip file"
+
+def test_readchunks1():
+    reader = FastqReader(io.BytesIO(b"@Header1\nACCT\n+\n!!!!\n@Header2\nACCT\n+\n!!!!\n@Header3\nACCT\n+\n!!!!\n"))
+    assert [len(entries) for entries in read_chunks(reader, 2)] == [2, 1], "Check that entries are read in chunks of the given size"
+
+def test_fastqreader1():
+    reader = FastqReader(io.BytesIO(b"@Header1\r\nACCT\r\n+\r\n!!!!\r\n@Header2\nACCT\n+\n!!!!"), blocksize = 5)
+    assert list(reader) == [Record('@Header1', 'ACCT', '+', '!!!!'), Record('@Header2', 'ACCT', '+', '!!!!')] and not reader.truncated, "Check that entries spanning several blocks are read, with or without a newline at the end of the file"
+
+def test_fastqreader2():
+    reader = FastqReader(io.BytesIO(b"@Header1\nACCT\n+\n!!!!\n@Header2\nACCT\n"))
+    assert list(reader) == [Record('@Header1', 'ACCT', '+', '!!!!'), Record('@Header2', 'ACCT', '', '')] and reader.truncated, "Check that a truncated last entry is detected"
+
+def test_fastqwriter1():
+    o = io.BytesIO()
+    writer = FastqWriter(o, blocksize = 8)
+    for line in ['@Header1', 'ACCT', '+', '!!!!']:
+        writer.write(line + "\n")
+    writer.flush()
+    assert o.getvalue() == b"@Header1\nACCT\n+\n!!!!\n", "Check that the writer writes all text in blocks"
+
+def test_processparallel1():
+    args = Namespace(phred = None, trimtype = "N", thres3 = 1, thres5 = None, movwin = None, minlen = None, minqual = None, maxN = None, batchsize = None, threads = 2)
+    chunks = [[['@Header%d' % i, 'ACCT', '+', '!!!!']] for i in range(6)]
+    results = list(process_parallel(iter(chunks), args, size = entry_bytes))
+    assert ''.join(text for (text, counts), nbytes in results) == ''.join('@Header%d\nACC\n+\n!!!\n' % i for i in range(6)), "Check that chunks processed in worker processes are returned in the original order"
+    assert [nbytes for result, nbytes in results] == [entry_bytes(chunk) for chunk in chunks], "Check that the size of every chunk is returned with its result"
+
+def test_parallelgzipwriter1():
+    o = io.BytesIO()
+    o.close = lambda: None
+    with ParallelGzipWriter(o, level = 1, threads = 2, blocksize = 10) as writer:
+        for i in range(20):
+            writer.write(b"@Header%d\nACCT\n+\n!!!!\n" % i)
+    assert gzip.decompress(o.getvalue()) == b"".join(b"@Header%d\nACCT\n+\n!!!!\n" % i for i in range(20)), "Check that blocks compressed in threads are a valid gzip file with the output in order"
+
+def test_threadedreader1():
+    data = b"@Header1\nACCT\n+\n!!!!\n" * 100
+    with ThreadedReader(io.BytesIO(data), blocksize = 7) as f:
+        assert b"".join(iter(lambda: f.read(), b"")) == data, "Check that blocks read in a background thread are returned in order"
+
+def test_detectformat1():
+    assert [detect_format(head) for head in [gzip.compress(b"@"), bgzf_compress(b"@"), b"BZh91AY", b"\xfd7zXZ\x00\x00", b"\x28\xb5\x2f\xfd", b"@Header1"]] == ['gzip', 'bgzf', 'bzip2', 'xz', 'zstd', 'fastq'], "Check that the file format is detected from the first bytes"
+
+def test_outputformat1():
+    args = Namespace(outformat = None)
+    assert [output_format(filename, args) for filename in ['out.fq.gz', 'out.fq.bz2', 'out.fq', '-']] == ['gzip', 'bzip2', 'fastq', 'fastq'], "Check that the output format is given by the extension of the output file"
+
+def test_bgzfcompress1():
+    data = b"@Header1\nACCT\n+\n!!!!\n" * 10000
+    assert gzip.decompress(bgzf_compress(data, 1) + BGZF_EOF) == data, "Check that BGZF blocks are a valid gzip file"
+
+def test_progress1(tmp_path):
+    progress = Progress(every = 2, progressfile = tmp_path / "progress.txt")
+    for _ in range(5):
+        progress.update(1, 10)
+    progress.close()
+    lines = (tmp_path / "progress.txt").read_text().splitlines()
+    assert len(lines) == 3 and "5 entries" in lines[-1], "Check that progress is reported every given number of entries, and once at the end"
+
+def test_deduplicator1():
+    dedup = Deduplicator('exact')
+    assert dedup.filter("@Header1\nACCT\n+\n!!!!\n@Header2\nACCT\n+\n!!!!\n@Header3\nACC\n+\n!!!\n") == (("@Header1\nACCT\n+\n!!!!\n@Header3\nACC\n+\n!!!\n",), 1) \
+        and dedup.filter("@Header4\nACC\n+\n!!!\n", "@Header4\nACCT\n+\n!!!!\n")[1] == 0, "Check that duplicates of entries already written are removed, and pairs are keyed on both sequences"
+
+def test_deduplicator2():
+    dedup = Deduplicator('exact', memory = 100 * HASH_BYTES)
+    for i in range(100):
+        dedup.seen('ACCT' * i)
+    assert dedup.bits is not None and all(dedup.seen('ACCT' * i) for i in range(100)) and dedup.duplicates == 100, "Check that exact mode turns into a Bloom filter at the memory cap, which finds all duplicates"
+
+def test_deduplicator3():
+    with pytest.raises(ValueError):
+        Deduplicator('bloom')
+    with pytest.raises(ValueError):
+        make_deduplicator(Namespace(dedup = 'exact', dedupmemory = 0, dedupfp = None))
+    assert len(Deduplicator('bloom', memory = 1000).bits) == 1000, "Check that a Bloom filter needs a memory cap, which cannot be 0"
+
+def test_deduplicator4():
+    script = "import sys; sys.path.append('src'); from xtrim import Deduplicator; dedup = Deduplicator('bloom', memory = 16); print([dedup.seen(('ACCT' * i, 'GA')) for i in range(100)])"
+    outputs = [subprocess.run([sys.executable, '-c', script], env = dict(os.environ, PYTHONHASHSEED = seed), capture_output = True, text = True, check = True).stdout for seed in ('1', '2')]
+    assert outputs[0] == outputs[1] and 'True' in outputs[0], "Check that a Bloom filter removes the same reads in every run"
+
+def test_processfile1():
+    args = Namespace(phred = 33, trimtype = "N", thres3 = 1, thres5 = None, movwin = None, minlen = None, minqual = None, maxN = None, batchsize = None, threads = None)
+    o = io.BytesIO()
+    writer = FastqWriter(o)
+    counts = process_file(FastqReader(io.BytesIO(b"@Header1\nACCT\n+\n!!!!\n@Header2\nACCT\n+\n!!!!\n")), writer, None, args, dedup = Deduplicator())
+    writer.flush()
+    assert counts == (1, 0, 0, 0, 0) and o.getvalue() == b"@Header1\nACC\n+\n!!!\n", "Check that duplicates are not written or counted as kept"
+
+def test_checkpoint1(tmp_path):
+    args = Namespace(phred = 33, trimtype = "N", thres3 = 1, thres5 = None, movwin = None, minlen = None, minqual = None, maxN = None, batchsize = None, threads = None, 
+                     outformat = None, complevel = None, compthreads = None, external = False, checkpoint = 2, checkpointfile = None, resume = False)
+    data = b"".join(b"@Header%d\nACCT\n+\n!!!!\n" % i for i in range(5))
+    output = str(tmp_path / "out.fq.gz")
+
+    def killed():
+        yield from list(FastqReader(io.BytesIO(data)))[:3]
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        process_checkpointed(killed(), "in.fq", output, "fastq", args)
+    args.resume = True
+    counts = process_checkpointed(FastqReader(io.BytesIO(data)), "in.fq", output, "fastq", args)
+    assert counts == (5, 0, 0, 0, 0) and gzip.decompress((tmp_path / "out.fq.gz").read_bytes()) == b"".join(b"@Header%d\nACC\n+\n!!!\n" % i for i in range(5)) \
+        and not (tmp_path / "out.fq.gz.checkpoint").exists(), "Check that a stopped run goes on from the last checkpoint, and the output is one valid gzip file"
+
+def test_readmanifest1(tmp_path):
+    (tmp_path / "manifest.txt").write_text("# input output\nin.fq\tout.fq\n\nin1.fq in2.fq out1.fq out2.fq single.fq\n")
+    assert read_manifest(str(tmp_path / "manifest.txt")) == [FileJob(['in.fq'], ['out.fq'], None), FileJob(['in1.fq', 'in2.fq'], ['out1.fq', 'out2.fq'], 'single.fq')], "Check that single and paired jobs are read from a manifest"
+
+def test_globjobs1(tmp_path):
+    (tmp_path / "a.fq").write_bytes(b"@Header1\nACCT\n+\n!!!!\n")
+    (tmp_path / "b.fq").write_bytes(b"@Header1\nACCT\n+\n!!!!\n" * 2)
+    jobs = glob_jobs([str(tmp_path / "*.fq")], str(tmp_path / "out"))
+    assert [job.outputs for job in jobs] == [[str(tmp_path / "out" / "a.fq")], [str(tmp_path / "out" / "b.fq")]] and sorted(jobs, key = job_size, reverse = True)[0] == jobs[1], "Check that every matched file gets an output file in the output directory, and the largest file is first"
+    with pytest.raises(ValueError):
+        glob_jobs([str(tmp_path / "*.fq")], str(tmp_path))
+
+def test_checkjobs1(tmp_path):
+    for lane in ("lane1", "lane2"):
+        (tmp_path / lane).mkdir()
+        (tmp_path / lane / "a.fq").write_bytes(b"@Header1\nACCT\n+\n!!!!\n")
+    with pytest.raises(ValueError):
+        glob_jobs([str(tmp_path / "lane1" / "*.fq"), str(tmp_path / "lane2" / "*.fq")], str(tmp_path / "out"))
+    with pytest.raises(ValueError):
+        check_jobs([FileJob(['in1.fq'], ['out.fq'], None), FileJob(['in2.fq', 'in3.fq'], ['out1.fq', 'out2.fq'], 'out.fq')])
+
+def test_jobmemory1():
+    args = Namespace(compthreads = None, batchsize = None, dedup = 'bloom', dedupmemory = 100)
+    assert job_memory(FileJob(['in.fq'], ['out.fq'], None), args) >= 100e6, "Check that the memory cap of deduplication is part of the memory of a job"
+
+def test_profiler1(tmp_path):
+    args = Namespace(phred = 33, trimtype = "N", thres3 = 1, thres5 = None, movwin = None, minlen = 3, minqual = None, maxN = None, batchsize = None, threads = None)
+    profiler = Profiler()
+    reader = FastqReader(TimedFile(io.BytesIO(b"@Header1\nACCT\n+\n!!!!\n@Header2\nACC\n+\n!!!\nHeader3\nACCT\n+\n!!!!\n"), profiler, 'decompress'))
+    writer = FastqWriter(TimedFile(io.BytesIO(), profiler, 'compress'))
+    counts = process_file(reader, writer, None, args, profiler = profiler)
+    writer.flush()
+    profiler.write_report(str(tmp_path / "profile.tsv"), dict(zip(COUNT_NAMES, counts)), [], [])
+    lines = (tmp_path / "profile.tsv").read_text().splitlines()
+    assert counts == (1, 0, 1, 1, 0) and profiler.calls['control'] == 3 and profiler.calls['trim'] == 2 and profiler.bytes['compress'] == 19 \
+        and "histograms.length_before.4\t1" in lines and "histograms.length_after.3\t1" in lines, "Check that stages, bytes and histograms are recorded"
+
+def test_profiler2():
+    pytest.importorskip("numpy")
+    entries = [Record('@Header1', 'ACCTGAACGNAAXTGG', '+', '!"#$%&()*+,-./!#'), Record('Header2', 'ACCT', '+', '!!!!'), Record('@Header3', 'ACCTGAACGN', '+', '5555555555')]
+    profilers = Profiler(timing = False), Profiler()
+    process_chunk(entries, Namespace(phred = 33, trimtype = "Q", thres3 = 2, thres5 = 3, movwin = 2, minlen = 5, minqual = None, maxN = None, batchsize = None), profilers[0])
+    process_chunk(entries, Namespace(phred = 33, trimtype = "Q", thres3 = 2, thres5 = 3, movwin = 2, minlen = 5, minqual = None, maxN = None, batchsize = 10), profilers[1])
+    assert profilers[0].histograms == profilers[1].histograms and profilers[0].histograms['length_before'] == {16: 1, 10: 1} and not profilers[0].calls, "Check that batch mode makes the same histograms, and that a Profiler without timing does not time the steps"
+
 # Random text file
 # 1 of the reads have diff seq length than quality length
 # Entries with diff phred score values